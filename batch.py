@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Generates the résumés of several people at once.
+
+Each person has their own input directory, laid out like the main one, and gets
+their own build and output directories, named after them. People are spread
+across a pool of processes, and each process shares its renderers, and so its
+compiled templates, between all the people it builds.
+
+"""
+import argparse
+import os
+import posixpath
+import sys
+import traceback
+
+import config
+from contexts import CONTEXTS
+
+
+def person_name(yaml_dir):
+    """
+    Name a person after their input directory.
+
+    Parameters
+    ----------
+    yaml_dir : str
+        The input directory of the person.
+
+    Returns
+    -------
+    str
+        The name of the directory, or of its parent if the directory has the
+        same name as the main input directory.
+
+    """
+    yaml_dir = posixpath.normpath(os.path.abspath(yaml_dir))
+    name = posixpath.basename(yaml_dir)
+    if name == posixpath.basename(config.YAML_DIR):
+        name = posixpath.basename(posixpath.dirname(yaml_dir))
+    return name
+
+
+def read_people(input_dirs=(), manifest=None):
+    """
+    List the people to generate résumés for.
+
+    Parameters
+    ----------
+    input_dirs : Optional[Iterable[str]]
+        The input directories of the people. Default is none.
+    manifest : Optional[str]
+        A YAML file listing more people. Each item is either an input directory,
+        or a dictionary with the input directory under "inputs", and optionally
+        the name of the person under "name". Relative paths are relative to the
+        file. Default is not to read one.
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        The name and input directory of each person.
+
+    Raises
+    ------
+    ValueError
+        If two people have the same name.
+
+    """
+    entries = [{"inputs": yaml_dir} for yaml_dir in input_dirs]
+    if manifest is not None:
+        from loader import load_yaml
+        base_dir = posixpath.dirname(manifest)
+        for entry in load_yaml(manifest) or []:
+            if isinstance(entry, str):
+                entry = {"inputs": entry}
+            entry = dict(entry, inputs=posixpath.join(base_dir,
+                                                      entry["inputs"]))
+            entries.append(entry)
+
+    people = []
+    names = set()
+    for entry in entries:
+        name = entry.get("name") or person_name(entry["inputs"])
+        if name in names:
+            raise ValueError("more than one person is named {!r}"
+                             .format(name))
+        names.add(name)
+        people.append((name, entry["inputs"]))
+    return people
+
+
+def build_person(name, yaml_dir, context_names, no_letters=True, jobs=1,
+                 cache=False, precompile_preamble=False, pipeline=False):
+    """
+    Generate the résumés of one person.
+
+    Parameters
+    ----------
+    name : str
+        The name of the person, used for their build and output directories.
+    yaml_dir : str
+        The input directory of the person.
+    context_names : list[str]
+        The names of the formats to generate.
+    no_letters : Optional[bool]
+        Whether to generate cover letters with LaTeX. Default is True. People
+        without a business file get no cover letters.
+    jobs : Optional[int]
+        The number of formats to render, or LaTeX files to compile, at once.
+        Default is 1.
+    cache : Optional[bool]
+        Whether to keep compiled templates and rendered sections between runs,
+        shared by everyone. Default is False.
+    precompile_preamble : Optional[bool]
+        Whether to precompile the LaTeX preamble into a format file. Default is
+        False.
+    pipeline : Optional[bool]
+        Whether to compile LaTeX files as soon as they are rendered. Default is
+        False.
+
+    Returns
+    -------
+    tuple[str, int]
+        The summary of the build, and the number of files which failed to
+        compile.
+
+    """
+    import loader
+    import progress
+    from resume_generator import (environment_setup, get_renderer,
+                                  ResumeGenerator)
+
+    progress.enabled = False
+    loader.stats.clear()
+    build_dir = posixpath.join(config.BUILD_DIR, name)
+    output_dir = posixpath.join(config.OUTPUT_DIR, name)
+    environment_setup(build_dir, output_dir)
+
+    generator = ResumeGenerator(precompile_preamble=precompile_preamble,
+                                quiet=True, yaml_dir=yaml_dir,
+                                build_dir=build_dir, output_dir=output_dir)
+    cache_dir = (posixpath.join(config.BUILD_DIR, config.CACHE_DIR)
+                 if cache else None)
+    context_map = {context_name: get_renderer(context_name, cache_dir)
+                   for context_name in context_names}
+    no_letters = no_letters and os.path.exists(generator.businesses_file)
+    generator.build(context_map, no_letters=no_letters, jobs=jobs,
+                    pipeline=pipeline)
+    return generator.summary(), generator.stats["failed"]
+
+
+def run_batch(people, processes=None, **options):
+    """
+    Generate the résumés of several people.
+
+    Parameters
+    ----------
+    people : list[tuple[str, str]]
+        The name and input directory of each person.
+    processes : Optional[int]
+        The number of people to build at once. Default is the number of CPUs.
+    options
+        The options of `build_person`.
+
+    Returns
+    -------
+    bool
+        Whether everything was generated successfully.
+
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    def report(name, build):
+        try:
+            summary, failed = build()
+        except Exception:
+            print("{}: could not be generated".format(name), file=sys.stderr)
+            traceback.print_exc()
+            return False
+        print("{}: {}".format(name, summary))
+        return not failed
+
+    if processes == 1 or len(people) <= 1:
+        return all([report(name, lambda: build_person(name, yaml_dir,
+                                                      **options))
+                    for name, yaml_dir in people])
+
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(
+            min(processes, len(people))) as executor:
+        futures = {executor.submit(build_person, name, yaml_dir, **options):
+                   name for name, yaml_dir in people}
+        return all([report(futures[future], future.result)
+                    for future in concurrent.futures.as_completed(futures)])
+
+
+def main():
+    """
+    Main hook for script.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate the résumés and cover letters of several people."
+    )
+    parser.add_argument("inputs", metavar="DIR", nargs="*",
+                        help="the input directory of a person")
+    parser.add_argument("-m", "--manifest", metavar="FILE",
+                        help="a YAML file listing the input directories of "
+                             "more people")
+    parser.add_argument("-x", "--contexts", nargs="+", default=["latex"],
+                        choices=list(CONTEXTS),
+                        help="the contexts to generate (default is LaTeX)")
+    parser.add_argument("-l", "--no-letters", action="store_false",
+                        help="do not generate cover letters when running LaTeX")
+    parser.add_argument("-P", "--processes", type=int, default=None,
+                        help="the number of people to build at once (default "
+                             "is the number of CPUs)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="the number of formats to render, or LaTeX files "
+                             "to compile, at once for each person")
+    parser.add_argument("-f", "--precompile-preamble", action="store_true",
+                        help="precompile the shared LaTeX preamble into a "
+                             "format file")
+    parser.add_argument("-c", "--cache", action="store_true",
+                        help="keep compiled templates between runs")
+    parser.add_argument("-p", "--pipeline", action="store_true",
+                        help="compile PDFs while the rest are being rendered")
+
+    args = parser.parse_args()
+    try:
+        people = read_people(args.inputs, args.manifest)
+    except ValueError as error:
+        parser.error(str(error))
+    if not people:
+        parser.error("no input directories given")
+
+    success = run_batch(people, processes=args.processes,
+                        context_names=args.contexts,
+                        no_letters=args.no_letters,
+                        jobs=args.jobs,
+                        cache=args.cache,
+                        precompile_preamble=args.precompile_preamble,
+                        pipeline=args.pipeline)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
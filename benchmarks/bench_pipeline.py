@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the main stages of generating résumés and cover letters.
+
+Synthetic inputs are generated at the requested scale in a temporary directory,
+using the templates of this repository. LaTeX files are compiled with a stub
+engine by default, so no LaTeX installation is needed. The results are printed
+as JSON, so they can be compared across commits.
+
+Usage: ``python benchmarks/bench_pipeline.py --scale 1000 -o results.json``
+
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import posixpath
+import random
+import subprocess
+import sys
+import tempfile
+import timeit
+
+REPO_DIR = posixpath.dirname(posixpath.dirname(posixpath.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import yaml
+
+import config
+import progress
+from contexts import CONTEXTS
+from resume_generator import ContextRenderer, ResumeGenerator, load_yaml
+
+
+STUB_ENGINE = '''\
+import os
+import sys
+
+arguments = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+output_dir = "."
+for arg in sys.argv[1:]:
+    if arg.startswith("-output-directory="):
+        output_dir = arg.split("=", 1)[1]
+stem = os.path.splitext(os.path.basename(arguments[-1]))[0]
+with open(arguments[-1], "rb") as fin, \\
+        open(os.path.join(output_dir, stem + ".pdf"), "wb") as fout:
+    fout.write(b"%PDF-1.4\\n" + fin.read())
+with open(os.path.join(output_dir, stem + ".log"), "w") as fout:
+    fout.write("Output written on {}.pdf\\n".format(stem))
+'''
+SECTION_TYPES = ["experience", "education", "items"]
+WORDS = ("data analysis design engineering systems research model report "
+         "pipeline team project product customer quality \\textbf{impact} "
+         "\\textit{scale} 10\\% growth --- results -- ``quoted'' \\LaTeX "
+         "\\ services").split()
+
+
+def sentence(rng, length=12):
+    """
+    Generate a random sentence.
+
+    Parameters
+    ----------
+    rng : random.Random
+        The random number generator.
+    length : Optional[int]
+        The number of words. Default is 12.
+
+    Returns
+    -------
+    str
+        The sentence.
+
+    """
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize()
+
+
+def synthetic_section(rng, section_type, n_items=5):
+    """
+    Generate the data for a section.
+
+    Parameters
+    ----------
+    rng : random.Random
+        The random number generator.
+    section_type : str
+        One of `SECTION_TYPES`.
+    n_items : Optional[int]
+        The number of items in the section. Default is 5.
+
+    Returns
+    -------
+    list[dict]
+        The section data.
+
+    """
+    if section_type == "experience":
+        return [{"date": "20{:02d}--20{:02d}".format(i, i + 1),
+                 "about": sentence(rng, 3),
+                 "department": sentence(rng, 2),
+                 "employer": sentence(rng, 2),
+                 "location": "City {}".format(i),
+                 "notes": [sentence(rng) for _ in range(4)]}
+                for i in range(n_items)]
+    elif section_type == "education":
+        return [{"date": "20{:02d}--20{:02d}".format(i, i + 4),
+                 "school": sentence(rng, 3),
+                 "location": "City {}".format(i),
+                 "major": sentence(rng, 4),
+                 "urls": {"school": "https://example.com/{}".format(i)}}
+                for i in range(n_items)]
+    return [{"name": sentence(rng, 2), "description": sentence(rng)}
+            for _ in range(n_items)]
+
+
+def synthetic_resume(n_sections, n_publications, seed=0):
+    """
+    Generate the main YAML data.
+
+    Parameters
+    ----------
+    n_sections : int
+        The number of sections.
+    n_publications : int
+        The number of publications. If nonzero, a publications section is added.
+    seed : Optional[int]
+        The random seed. Default is 0.
+
+    Returns
+    -------
+    dict
+        The résumé data.
+
+    """
+    rng = random.Random(seed)
+    data = {
+        "name": {"first": "Ada", "last": "Example", "abbrev": "aexample"},
+        "engine": "pdflatex",
+        "last_updated_method": "time",
+        "theme": {"font_size": "10pt", "paper_size": "a4paper",
+                  "style": "banking", "colour": "black"},
+        "title": "Résumé",
+        "contact": {"email": "ada@example.com", "github": "aexample"},
+        "order": [],
+    }
+    for i in range(n_sections):
+        section_type = SECTION_TYPES[i % len(SECTION_TYPES)]
+        tag = "section{}".format(i)
+        data[tag] = synthetic_section(rng, section_type)
+        data["order"].append([tag, 1, sentence(rng, 2), section_type])
+    if n_publications:
+        data["order"].append(["publications", 1, "Publications", 0])
+    return data
+
+
+def synthetic_publications(n_publications, seed=0):
+    """
+    Generate the publications YAML data.
+
+    Parameters
+    ----------
+    n_publications : int
+        The number of publications.
+    seed : Optional[int]
+        The random seed. Default is 0.
+
+    Returns
+    -------
+    list[dict]
+        The publications.
+
+    """
+    rng = random.Random(seed)
+    return [{"title": sentence(rng, 8),
+             "authors": "A. Example and B. Example",
+             "key": "example{}".format(i),
+             "year": 1990 + i % 30,
+             "venuetype": "In ",
+             "venue": sentence(rng, 4),
+             "abstract": sentence(rng, 40)}
+            for i in range(n_publications)]
+
+
+def synthetic_businesses(n_businesses, seed=0):
+    """
+    Generate the business YAML data.
+
+    Parameters
+    ----------
+    n_businesses : int
+        The number of businesses.
+    seed : Optional[int]
+        The random seed. Default is 0.
+
+    Returns
+    -------
+    dict[str, dict]
+        The businesses, by name.
+
+    """
+    rng = random.Random(seed)
+    return {"business{}".format(i): {
+        "name": {"formal": sentence(rng, 3), "informal": sentence(rng, 1)},
+        "field": "companies",
+        "best_in": "City {}".format(i),
+        "position": {"name": sentence(rng, 2), "article": "a",
+                     "has_posting": bool(i % 2),
+                     "posting_id": "ID-{}".format(i)},
+        "letter": {"addressee": "HR Department",
+                   "address": "{} Example Street".format(i),
+                   "custom_section": sentence(rng, 30)},
+    } for i in range(n_businesses)}
+
+
+def write_inputs(directory, n_sections, n_publications, n_businesses):
+    """
+    Set up a directory in which to generate synthetic résumés.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to use.
+    n_sections : int
+        The number of sections.
+    n_publications : int
+        The number of publications.
+    n_businesses : int
+        The number of businesses.
+
+    Returns
+    -------
+    str
+        The command running the stub LaTeX engine.
+
+    """
+    os.symlink(posixpath.join(REPO_DIR, config.TEMPLATES_DIR),
+               posixpath.join(directory, config.TEMPLATES_DIR))
+    os.makedirs(posixpath.join(directory, config.YAML_DIR))
+
+    stub_file = posixpath.join(directory, "stub_engine.py")
+    with open(stub_file, "w") as fout:
+        fout.write(STUB_ENGINE)
+
+    data = synthetic_resume(n_sections, n_publications)
+    data["engine"] = "{} {}".format(sys.executable, stub_file)
+    for name, contents in ((config.YAML_MAIN, data),
+                           (config.YAML_PUBLICATIONS,
+                            synthetic_publications(n_publications)),
+                           (config.YAML_BUSINESSES,
+                            synthetic_businesses(n_businesses))):
+        with open(posixpath.join(directory, config.YAML_DIR,
+                                 name + ".yaml"), "w") as fout:
+            yaml.safe_dump(contents, fout, allow_unicode=True)
+    return data["engine"]
+
+
+def measure(function, repeat):
+    """
+    Time a function.
+
+    Parameters
+    ----------
+    function : callable
+        The function to time.
+    repeat : int
+        The number of times to call it.
+
+    Returns
+    -------
+    dict
+        The fastest and mean times in seconds, and the number of calls.
+
+    """
+    times = timeit.repeat(function, number=1, repeat=repeat)
+    return {"min": min(times), "mean": sum(times) / len(times),
+            "repeat": repeat}
+
+
+def run_benchmarks(context_names, repeat=3, jobs=1, compile_pdfs=True):
+    """
+    Time each stage in the current directory.
+
+    Parameters
+    ----------
+    context_names : list[str]
+        The contexts to benchmark.
+    repeat : Optional[int]
+        The number of times to time each stage. Default is 3.
+    jobs : Optional[int]
+        The number of LaTeX files to compile at once. Default is 1.
+    compile_pdfs : Optional[bool]
+        Whether to time compiling the LaTeX files. Default is True.
+
+    Returns
+    -------
+    dict[str, dict]
+        The timings, by stage.
+
+    """
+    results = {}
+    for name in (config.YAML_MAIN, config.YAML_PUBLICATIONS,
+                 config.YAML_BUSINESSES):
+        filename = posixpath.join(config.YAML_DIR, name + ".yaml")
+        results["load_yaml/{}".format(name)] = measure(
+            lambda: load_yaml(filename), repeat)
+
+    generator = ResumeGenerator()
+    generator.handle_publications()
+    for context_name in context_names:
+        context = ContextRenderer(**CONTEXTS[context_name])
+        prepared = context.prepare(generator.data)
+        rendered = context.render_resume(dict(generator.data))
+
+        def render_sections(context=context, prepared=prepared):
+            for section in prepared["order"]:
+                context._render_section(section, prepared)
+
+        def uncached(function, context=context):
+            def run():
+                context._sections.clear()
+                function()
+            return run
+
+        render_resume = (lambda context=context:
+                         context.render_resume(dict(generator.data)))
+        for stage, function in (
+                ("_make_replacements",
+                 lambda: context._make_replacements(generator.data)),
+                ("_render_section", uncached(render_sections)),
+                ("_render_section/cached", render_sections),
+                ("render_resume", uncached(render_resume)),
+                ("render_resume/cached", render_resume),
+                ("write", lambda: generator.write(
+                     context, rendered, context.username(generator.data)))):
+            results["{}/{}".format(stage, context_name)] = measure(function,
+                                                                  repeat)
+
+    contexts = [ContextRenderer(**CONTEXTS[context_name])
+                for context_name in context_names]
+
+    def generate_resumes():
+        generator.manifest.entries = {}
+        for context in contexts:
+            context._sections.clear()
+        generator.generate_resumes(contexts, jobs=jobs)
+
+    results["generate_resumes"] = measure(generate_resumes, repeat)
+
+    if "latex" in context_names:
+        context = ContextRenderer(**CONTEXTS["latex"])
+
+        def generate_cover_letters():
+            generator.manifest.entries = {}
+            context._sections.clear()
+            generator.generate_cover_letters(context)
+
+        results["generate_cover_letters/latex"] = measure(
+            generate_cover_letters, repeat)
+
+        if compile_pdfs:
+            def compile_latex():
+                generator.manifest.entries = {}
+                generator.compile_latex(jobs=jobs)
+
+            results["compile_latex/latex"] = measure(compile_latex, repeat)
+    return results
+
+
+def git_revision():
+    """
+    Find the current commit of the repository.
+
+    Returns
+    -------
+    str|None
+        The commit hash, or None if it cannot be determined.
+
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                       cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL).decode()\
+                         .strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """
+    Main hook for script.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=int, default=None,
+                        help="set the number of sections, publications, and "
+                             "businesses at once")
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--publications", type=int, default=10)
+    parser.add_argument("--businesses", type=int, default=10)
+    parser.add_argument("--contexts", nargs="+", default=list(CONTEXTS),
+                        choices=list(CONTEXTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--engine", default=None,
+                        help="the LaTeX engine to use instead of the stub")
+    parser.add_argument("--no-compile", action="store_true",
+                        help="do not time compiling LaTeX files")
+    parser.add_argument("-o", "--output", default=None,
+                        help="the file to write the results to (default is "
+                             "standard output)")
+    args = parser.parse_args()
+    if args.scale is not None:
+        args.sections = args.publications = args.businesses = args.scale
+    progress.enabled = False
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = write_inputs(directory, args.sections, args.publications,
+                              args.businesses)
+        if args.engine is not None:
+            engine = args.engine
+            main_file = posixpath.join(directory, config.YAML_DIR,
+                                       config.YAML_MAIN + ".yaml")
+            data = load_yaml(main_file)
+            data["engine"] = engine
+            with open(main_file, "w") as fout:
+                yaml.safe_dump(data, fout, allow_unicode=True)
+
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            os.makedirs(config.BUILD_DIR, exist_ok=True)
+            results = run_benchmarks(args.contexts, repeat=args.repeat,
+                                     jobs=args.jobs,
+                                     compile_pdfs=not args.no_compile)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "revision": git_revision(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {"sections": args.sections,
+                       "publications": args.publications,
+                       "businesses": args.businesses,
+                       "contexts": args.contexts,
+                       "repeat": args.repeat,
+                       "jobs": args.jobs,
+                       "engine": engine if args.engine else "stub"},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as fout:
+            fout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the replacements performed by each context on a large résumé.
+
+The main résumé is enlarged by repeating its experience section, with each copy
+made unique, and the current implementation is compared to applying every
+replacement to every string with ``re.sub``.
+
+Usage: ``python benchmarks/bench_replacements.py [copies]``
+
+"""
+import copy
+import os
+import posixpath
+import re
+import sys
+import timeit
+
+sys.path.insert(0, posixpath.dirname(posixpath.dirname(
+    posixpath.abspath(__file__))))
+
+import config
+from contexts import CONTEXTS
+from resume_generator import ContextRenderer, load_yaml
+
+
+def naive_replacements(replacements, data):
+    """
+    Perform the replacements by recursively copying the data.
+
+    Parameters
+    ----------
+    replacements : dict[str, str]
+        The replacements to perform.
+    data : dict
+        The résumé data.
+
+    Returns
+    -------
+    dict
+        A copy of the data containing the replaced strings.
+
+    """
+    data = copy.copy(data)
+
+    if isinstance(data, str):
+        for o, r in replacements.items():
+            data = re.sub(o, r, data)
+
+    elif isinstance(data, dict):
+        for k, v in data.items():
+            data[k] = naive_replacements(replacements, v)
+
+    elif isinstance(data, list):
+        for idx, item in enumerate(data):
+            data[idx] = naive_replacements(replacements, item)
+
+    return data
+
+
+def large_resume(copies):
+    """
+    Enlarge the main résumé.
+
+    Parameters
+    ----------
+    copies : int
+        The number of copies of the experience section to make.
+
+    Returns
+    -------
+    dict
+        The résumé data.
+
+    """
+    data = load_yaml(posixpath.join(config.YAML_DIR,
+                                    config.YAML_MAIN + ".yaml"))
+    experience = data["exp"]
+    data["exp"] = []
+    for i in range(copies):
+        for job in experience:
+            job = copy.deepcopy(job)
+            job["about"] = r"\textbf{{{}}} --- role {}".format(job["about"], i)
+            job["notes"] = [r"{} \textit{{({}\%)}}".format(note, i)
+                            for note in job.get("notes", [])]
+            data["exp"].append(job)
+    return data
+
+
+def main(copies=1000, repeat=3):
+    """
+    Run the benchmark and print the results.
+
+    Parameters
+    ----------
+    copies : Optional[int]
+        The number of copies of the experience section to make. Default is
+        1000.
+    repeat : Optional[int]
+        The number of times to time each implementation. Default is 3.
+
+    """
+    os.chdir(posixpath.dirname(posixpath.dirname(posixpath.abspath(__file__))))
+    data = large_resume(copies)
+    print("{} experience entries".format(len(data["exp"])))
+    for context_name in ("html", "markdown"):
+        replacements = CONTEXTS[context_name]["replacements"]
+        assert (naive_replacements(replacements, data)
+                == ContextRenderer(**CONTEXTS[context_name])
+                ._make_replacements(data))
+
+        naive = min(timeit.repeat(
+            lambda: naive_replacements(replacements, data),
+            number=1, repeat=repeat))
+        cold = min(timeit.repeat(
+            lambda: ContextRenderer(**CONTEXTS[context_name])
+            ._make_replacements(data),
+            number=1, repeat=repeat))
+        renderer = ContextRenderer(**CONTEXTS[context_name])
+        warm = min(timeit.repeat(lambda: renderer._make_replacements(data),
+                                 number=1, repeat=repeat))
+        print("{:<10} re.sub: {:8.3f}s  cold: {:8.3f}s ({:5.1f}x)  "
+              "warm: {:8.3f}s ({:5.1f}x)"
+              .format(context_name, naive, cold, naive / cold,
+                      warm, naive / warm))
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
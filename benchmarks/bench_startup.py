@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmarks how long the command line takes to start and to do nothing.
+
+Each case runs `generate.py` in a new interpreter on synthetic inputs, as in
+`bench_pipeline.py`: showing the help, a first build, and builds in which
+everything is already up to date. The heavy modules imported by an up-to-date
+build are also listed. The results are printed as JSON.
+
+Usage: ``python benchmarks/bench_startup.py --repeat 10 -o results.json``
+
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import posixpath
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from bench_pipeline import REPO_DIR, git_revision, write_inputs
+
+import config
+from contexts import CONTEXTS
+
+
+GENERATE = posixpath.join(REPO_DIR, "generate.py")
+HEAVY_MODULES = ["git", "jinja2", "tqdm", "yaml"]
+
+
+def run_generate(arguments, directory):
+    """
+    Run the command line in a new interpreter.
+
+    Parameters
+    ----------
+    arguments : list[str]
+        The arguments to pass to `generate.py`.
+    directory : str
+        The directory to run it in.
+
+    Returns
+    -------
+    subprocess.CompletedProcess
+        The finished process, with its standard error.
+
+    """
+    return subprocess.run([sys.executable] + arguments, cwd=directory,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          check=True)
+
+
+def measure(arguments, directory, repeat, setup=None):
+    """
+    Time the command line.
+
+    Parameters
+    ----------
+    arguments : list[str]
+        The arguments to pass to the interpreter.
+    directory : str
+        The directory to run it in.
+    repeat : int
+        The number of times to run it.
+    setup : Optional[callable]
+        A function to call before each run, which is not timed.
+
+    Returns
+    -------
+    dict
+        The fastest and mean times in seconds, and the number of runs.
+
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        times.append(timeit.timeit(lambda: run_generate(arguments, directory),
+                                   number=1))
+    return {"min": min(times), "mean": sum(times) / len(times),
+            "repeat": repeat}
+
+
+def imported_modules(arguments, directory):
+    """
+    Find which of the heavy modules are imported by the command line.
+
+    Parameters
+    ----------
+    arguments : list[str]
+        The arguments to pass to `generate.py`.
+    directory : str
+        The directory to run it in.
+
+    Returns
+    -------
+    list[str]
+        The heavy modules which were imported.
+
+    """
+    stderr = run_generate(["-X", "importtime", GENERATE] + arguments,
+                          directory).stderr.decode()
+    imported = {line.rsplit("|", 1)[-1].strip()
+                for line in stderr.splitlines()
+                if line.startswith("import time:")}
+    return [module for module in HEAVY_MODULES if module in imported]
+
+
+def run_benchmarks(directory, context_names, repeat=5):
+    """
+    Time each case.
+
+    Parameters
+    ----------
+    directory : str
+        The directory containing the inputs.
+    context_names : list[str]
+        The contexts to generate.
+    repeat : Optional[int]
+        The number of times to time each case. Default is 5.
+
+    Returns
+    -------
+    dict[str, dict]
+        The timings, by case.
+
+    """
+    build_dir = posixpath.join(directory, config.BUILD_DIR)
+
+    def clean():
+        shutil.rmtree(build_dir, ignore_errors=True)
+        os.makedirs(build_dir)
+
+    results = {
+        "interpreter": measure(["-c", "pass"], directory, repeat),
+        "help": measure([GENERATE, "--help"], directory, repeat),
+        "first_build": measure([GENERATE, "--quiet"] + context_names,
+                               directory, repeat, setup=clean),
+    }
+    for case, options in (("up_to_date", ["--quiet"]),
+                          ("up_to_date/cache", ["--quiet", "--cache"]),
+                          ("up_to_date/no_letters",
+                           ["--quiet", "--cache", "--no-letters"])):
+        arguments = options + context_names
+        run_generate([GENERATE] + arguments, directory)
+        results[case] = measure([GENERATE] + arguments, directory, repeat)
+        results[case]["imported"] = imported_modules(arguments, directory)
+    return results
+
+
+def main():
+    """
+    Main hook for script.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=int, default=10,
+                        help="the number of sections, publications, and "
+                             "businesses")
+    parser.add_argument("--contexts", nargs="+", default=list(CONTEXTS),
+                        choices=list(CONTEXTS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", default=None,
+                        help="the file to write the results to (default is "
+                             "standard output)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_inputs(directory, args.scale, args.scale, args.scale)
+        results = run_benchmarks(directory, args.contexts, repeat=args.repeat)
+
+    report = {
+        "revision": git_revision(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {"scale": args.scale,
+                       "contexts": args.contexts,
+                       "repeat": args.repeat},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as fout:
+            fout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
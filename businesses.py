@@ -0,0 +1,218 @@
+"""
+Reads the businesses to which cover letters are addressed.
+
+Businesses are read lazily, so that very large exports can be processed with
+bounded memory. The following formats are supported:
+
+- YAML, as a mapping of names to businesses, optionally split over several
+  documents. A document can also be a single business with a ``company`` field.
+- JSON Lines, with one business per line and a ``company`` field.
+- CSV, with one business per row, a ``company`` column, and nested fields named
+  with dots, such as ``name.formal``.
+
+The ``company`` field is the name used in the filename.
+
+A single-document YAML file, such as the default business file, can instead be
+loaded whole through the YAML cache, so that it is only parsed when it changes.
+
+"""
+import csv
+import itertools
+import json
+import posixpath
+
+from loader import load_yaml, safe_loader
+
+KEY_FIELD = "company"
+CSV_BOOLEANS = {"true": True, "false": False}
+
+
+def iter_businesses(filename, cache_dir=None):
+    """
+    Read businesses from a file, one at a time.
+
+    Parameters
+    ----------
+    filename : str
+        The file to read. Its format is determined by its extension.
+    cache_dir : Optional[str]
+        The directory in which to cache a YAML file, which must then have a
+        single document. Default is to read it lazily instead.
+
+    Yields
+    ------
+    tuple[str, dict]
+        The name of each business, and its details.
+
+    Raises
+    ------
+    ValueError
+        If a business has no name.
+
+    """
+    ext = posixpath.splitext(filename)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        reader = _read_json_lines
+    elif ext == ".csv":
+        reader = _read_csv
+    elif cache_dir is not None:
+        yield from _read_documents([load_yaml(filename, cache_dir=cache_dir)],
+                                   filename)
+        return
+    else:
+        reader = _read_yaml
+
+    for business in reader(filename):
+        yield business
+
+
+def chunked(iterable, size):
+    """
+    Split an iterable into lists of a given size.
+
+    Parameters
+    ----------
+    iterable : Iterable
+        The items to split.
+    size : int
+        The maximum number of items in each list.
+
+    Yields
+    ------
+    list
+        The items, in order.
+
+    """
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+
+def _split_key(business, source):
+    """
+    Separate the name of a business from its details.
+
+    Parameters
+    ----------
+    business : dict
+        The business, including its name.
+    source : str
+        A description of where the business came from, for error messages.
+
+    Returns
+    -------
+    tuple[str, dict]
+        The name of the business, and its details.
+
+    Raises
+    ------
+    ValueError
+        If the business has no name.
+
+    """
+    business = dict(business)
+    name = business.pop(KEY_FIELD, None)
+    if not name:
+        raise ValueError("{}: missing {!r} field".format(source, KEY_FIELD))
+    return str(name), business
+
+
+def _read_yaml(filename):
+    """
+    Read businesses from a YAML file with one or more documents.
+
+    Parameters
+    ----------
+    filename : str
+        The file to read.
+
+    Yields
+    ------
+    tuple[str, dict]
+        The name of each business, and its details.
+
+    """
+    import yaml
+    with open(filename) as fin:
+        yield from _read_documents(yaml.load_all(fin, Loader=safe_loader()),
+                                   filename)
+
+
+def _read_documents(documents, filename):
+    """
+    Read businesses from YAML documents.
+
+    Parameters
+    ----------
+    documents : Iterable[dict]
+        The documents, each either a mapping of names to businesses, or a single
+        business.
+    filename : str
+        The file the documents came from, for error messages.
+
+    Yields
+    ------
+    tuple[str, dict]
+        The name of each business, and its details.
+
+    """
+    for document in documents:
+        if not document:
+            continue
+        if KEY_FIELD in document:
+            yield _split_key(document, filename)
+        else:
+            yield from document.items()
+
+
+def _read_json_lines(filename):
+    """
+    Read businesses from a JSON Lines file.
+
+    Parameters
+    ----------
+    filename : str
+        The file to read.
+
+    Yields
+    ------
+    tuple[str, dict]
+        The name of each business, and its details.
+
+    """
+    with open(filename) as fin:
+        for line_number, line in enumerate(fin, 1):
+            if line.strip():
+                yield _split_key(json.loads(line),
+                                 "{}:{}".format(filename, line_number))
+
+
+def _read_csv(filename):
+    """
+    Read businesses from a CSV file.
+
+    Parameters
+    ----------
+    filename : str
+        The file to read.
+
+    Yields
+    ------
+    tuple[str, dict]
+        The name of each business, and its details.
+
+    """
+    with open(filename, newline="") as fin:
+        for line_number, row in enumerate(csv.DictReader(fin), 2):
+            business = {}
+            for column, value in row.items():
+                if not column or value is None or value == "":
+                    continue
+                *parents, field = column.split(".")
+                node = business
+                for parent in parents:
+                    node = node.setdefault(parent, {})
+                node[field] = CSV_BOOLEANS.get(value.lower(), value)
+            yield _split_key(business, "{}:{}".format(filename, line_number))
@@ -1,5 +1,12 @@
 YAML_DIR = "inputs"
 BUILD_DIR = "build"
+AUX_DIR = "aux_files"
+FORMATS_DIR = "formats"
+MANIFEST_FILE = ".manifest.json"
+CACHE_DIR = ".cache"
+BYTECODE_DIR = "jinja"
+YAML_CACHE_DIR = "yaml"
+SECTION_CACHE_DIR = "sections"
 TEMPLATES_DIR = "templates"
 SECTIONS_DIR = "sections"
 DEFAULT_SECTION = "items"
@@ -12,3 +19,10 @@ YAML_MAIN = "resume"
 YAML_BUSINESSES = "businesses"
 YAML_PUBLICATIONS = "publications"
 DATE_FMT = "%Y--%m--%d"
+BUSINESS_CHUNK_SIZE = 256
+MANIFEST_SAVE_INTERVAL = 30
+SECTION_CACHE_SIZE = 1024
+LATEX_MAX_PASSES = 4
+SERVER_PORT = 8000
+SERVER_CACHE_SIZE = 64 * 1024 * 1024
+SERVER_REFRESH_INTERVAL = 1
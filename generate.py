@@ -6,10 +6,12 @@ More information is available in the README file.
 
 """
 import argparse
+import posixpath
 import sys
 
+import config
+import progress
 from contexts import CONTEXTS
-from resume_generator import environment_setup, ResumeGenerator
 
 
 class DefaultListAction(argparse.Action):
@@ -41,6 +43,11 @@ def main():
     """
     Main hook for script.
 
+    Returns
+    -------
+    int
+        The exit status: 1 if any LaTeX file failed to compile, or else 0.
+
     """
     parser = argparse.ArgumentParser(
         description="Generate resumes and cover letters."
@@ -51,12 +58,67 @@ def main():
                         default=["latex"])
     parser.add_argument("-l", "--no-letters", action="store_false",
                         help="do not generate cover letters when running LaTeX")
+    parser.add_argument("-b", "--businesses", metavar="FILE",
+                        help="read businesses from a YAML, JSON Lines, or CSV "
+                             "file instead of the business YAML file")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="the number of formats to render, or LaTeX files "
+                             "to compile, at once")
+    parser.add_argument("-f", "--precompile-preamble", action="store_true",
+                        help="precompile the shared LaTeX preamble into a "
+                             "format file")
+    parser.add_argument("-c", "--cache", action="store_true",
+                        help="keep compiled templates between runs")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="regenerate whenever the inputs or templates change")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write the time spent in each stage to a file, in "
+                             "the Chrome trace format")
+    parser.add_argument("-p", "--pipeline", action="store_true",
+                        help="compile PDFs while the rest are being rendered")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not show progress bars or a summary")
+    parser.add_argument("-s", "--serve", metavar="PORT", type=int, nargs="?",
+                        const=config.SERVER_PORT,
+                        help="serve résumés and cover letters over HTTP "
+                             "instead (default port is {})"
+                             .format(config.SERVER_PORT))
 
     args = parser.parse_args()
-
-    environment_setup()
-    ResumeGenerator().run(context_names=args.contexts,
-                          no_letters=args.no_letters)
+    progress.enabled = not args.quiet
+
+    # Imported only once the arguments are known to be valid, so that --help
+    # and usage errors return immediately.
+    import tracing
+    from resume_generator import environment_setup, ResumeGenerator
+
+    if args.profile is not None:
+        trace = tracing.add_hook(tracing.ChromeTrace())
+
+    try:
+        environment_setup()
+        if args.serve is not None:
+            import server
+            server.serve(args.serve, businesses_file=args.businesses,
+                         cache_dir=(posixpath.join(config.BUILD_DIR,
+                                                   config.CACHE_DIR)
+                                    if args.cache else None))
+            return
+        generator = ResumeGenerator(
+            businesses_file=args.businesses,
+            precompile_preamble=args.precompile_preamble,
+            quiet=args.quiet
+        )
+        generator.run(context_names=args.contexts,
+                      no_letters=args.no_letters,
+                      jobs=args.jobs,
+                      cache=args.cache,
+                      watch=args.watch,
+                      pipeline=args.pipeline)
+        return 1 if generator.stats["failed"] else 0
+    finally:
+        if args.profile is not None:
+            trace.save(args.profile)
 
 
 if __name__ == "__main__":
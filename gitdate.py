@@ -0,0 +1,212 @@
+"""
+Finds the time of the latest commit of a git repository.
+
+The commit is read directly from the ``.git`` directory, following symbolic
+and packed references, as long as it is stored as a loose object. Otherwise,
+GitPython is imported and used instead.
+
+"""
+import os
+import posixpath
+import re
+import zlib
+
+
+COMMITTER_PATTERN = re.compile(rb"^committer .* (\d+) [+-]\d{4}$", re.MULTILINE)
+
+
+def find_git_dir(path="."):
+    """
+    Find the git directory of the repository containing a path.
+
+    Parameters
+    ----------
+    path : Optional[str]
+        A path inside the repository. Default is the current directory.
+
+    Returns
+    -------
+    str
+        The git directory.
+
+    Raises
+    ------
+    LookupError
+        If the path is not inside a repository.
+
+    """
+    path = os.path.abspath(path)
+    while True:
+        dot_git = posixpath.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            # Worktrees and submodules point to their git directory
+            with open(dot_git) as fin:
+                contents = fin.read().strip()
+            if contents.startswith("gitdir:"):
+                return posixpath.join(path, contents[len("gitdir:"):].strip())
+        parent = posixpath.dirname(path)
+        if parent == path:
+            raise LookupError("not a git repository")
+        path = parent
+
+
+def common_dir(git_dir):
+    """
+    Find the directory containing the references and objects shared by all
+    worktrees.
+
+    Parameters
+    ----------
+    git_dir : str
+        The git directory.
+
+    Returns
+    -------
+    str
+        The common directory.
+
+    """
+    try:
+        with open(posixpath.join(git_dir, "commondir")) as fin:
+            return posixpath.join(git_dir, fin.read().strip())
+    except OSError:
+        return git_dir
+
+
+def resolve_ref(git_dir, ref="HEAD"):
+    """
+    Find the commit a reference points to.
+
+    Parameters
+    ----------
+    git_dir : str
+        The git directory.
+    ref : Optional[str]
+        The reference. Default is "HEAD".
+
+    Returns
+    -------
+    str
+        The hash of the commit.
+
+    Raises
+    ------
+    LookupError
+        If the reference cannot be resolved.
+
+    """
+    shared_dir = common_dir(git_dir)
+    for _ in range(10):
+        for directory in (git_dir, shared_dir):
+            try:
+                with open(posixpath.join(directory, ref)) as fin:
+                    contents = fin.read().strip()
+                break
+            except OSError:
+                continue
+        else:
+            contents = _packed_ref(shared_dir, ref)
+
+        if contents.startswith("ref:"):
+            ref = contents[len("ref:"):].strip()
+        else:
+            return contents
+    raise LookupError("too many levels of symbolic references")
+
+
+def _packed_ref(git_dir, ref):
+    """
+    Look up a reference in the packed references.
+
+    Parameters
+    ----------
+    git_dir : str
+        The git directory.
+    ref : str
+        The reference.
+
+    Returns
+    -------
+    str
+        The hash of the commit.
+
+    Raises
+    ------
+    LookupError
+        If the reference is not packed.
+
+    """
+    try:
+        with open(posixpath.join(git_dir, "packed-refs")) as fin:
+            for line in fin:
+                if line.startswith(("#", "^")):
+                    continue
+                sha, _, name = line.strip().partition(" ")
+                if name == ref:
+                    return sha
+    except OSError:
+        pass
+    raise LookupError("unknown reference {}".format(ref))
+
+
+def read_commit_time(git_dir, sha):
+    """
+    Read the commit time from a loose commit object.
+
+    Parameters
+    ----------
+    git_dir : str
+        The git directory.
+    sha : str
+        The hash of the commit.
+
+    Returns
+    -------
+    int
+        The commit time, in seconds since the epoch.
+
+    Raises
+    ------
+    LookupError
+        If the commit is not stored as a loose object.
+
+    """
+    object_file = posixpath.join(common_dir(git_dir), "objects", sha[:2],
+                                 sha[2:])
+    try:
+        with open(object_file, "rb") as fin:
+            contents = zlib.decompress(fin.read())
+    except (OSError, zlib.error):
+        raise LookupError("commit {} is not a loose object".format(sha))
+
+    header, _, body = contents.partition(b"\0")
+    match = COMMITTER_PATTERN.search(body)
+    if not header.startswith(b"commit ") or match is None:
+        raise LookupError("{} is not a commit".format(sha))
+    return int(match.group(1))
+
+
+def committed_date(path="."):
+    """
+    Find the time of the latest commit on the current branch.
+
+    Parameters
+    ----------
+    path : Optional[str]
+        A path inside the repository. Default is the current directory.
+
+    Returns
+    -------
+    int
+        The commit time, in seconds since the epoch.
+
+    """
+    try:
+        git_dir = find_git_dir(path)
+        return read_commit_time(git_dir, resolve_ref(git_dir))
+    except LookupError:
+        import git
+        return git.Repo(path, search_parent_directories=True)\
+                  .head.commit.committed_date
@@ -0,0 +1,459 @@
+"""
+Compiles LaTeX files into PDF.
+
+Each file is compiled in the build directory with its own auxiliary directory,
+so several files can be compiled at once without interfering with each other.
+The auxiliary directories are kept between runs, so that the ``.aux`` files of
+the previous run are reused, and the engine is run again only as long as its
+log asks for it. The files read by the engine are recorded, and reported as the
+dependencies of the PDF.
+
+The preamble shared by the documents can optionally be precompiled into a
+format file with the ``mylatexformat`` package, so that the class, packages,
+and fonts are only loaded once.
+
+"""
+import collections
+import hashlib
+import os
+import posixpath
+import re
+import subprocess
+import tempfile
+
+import config
+import tracing
+from progress import progress
+
+
+CompileResult = collections.namedtuple(
+    "CompileResult",
+    ["tex_file", "returncode", "log_file", "passes", "dependencies"]
+)
+BEGIN_DOCUMENT = r"\begin{document}"
+RERUN_PATTERN = re.compile(
+    r"Rerun to get|Label\(s\) may have changed|Please rerun LaTeX"
+    r"|Rerun LaTeX|\(rerunfilecheck\).*Rerun"
+)
+
+
+def aux_directory(tex_file):
+    """
+    Return the auxiliary directory used when compiling a file.
+
+    Parameters
+    ----------
+    tex_file : str
+        The LaTeX file.
+
+    Returns
+    -------
+    str
+        The path of the directory holding the auxiliary files.
+
+    """
+    build_dir, filename = posixpath.split(tex_file)
+    return posixpath.join(build_dir, config.AUX_DIR,
+                          posixpath.splitext(filename)[0])
+
+
+def engine_environment(source_date_epoch):
+    """
+    Make the environment in which to run the LaTeX engine.
+
+    Parameters
+    ----------
+    source_date_epoch : int
+        The time, in seconds since the epoch, to record in the PDFs.
+
+    Returns
+    -------
+    dict[str, str]
+        The current environment with ``SOURCE_DATE_EPOCH``, so that compiling
+        the same file gives the same PDF. ``FORCE_SOURCE_DATE`` is only set if
+        ``SOURCE_DATE_EPOCH`` was set by the user, since it also changes the
+        date given by ``\\today``, which cover letters use.
+
+    """
+    env = dict(os.environ, SOURCE_DATE_EPOCH=str(source_date_epoch))
+    if "SOURCE_DATE_EPOCH" in os.environ:
+        env["FORCE_SOURCE_DATE"] = "1"
+    return env
+
+
+def run_engine(engine, arguments, cwd, env=None):
+    """
+    Run the LaTeX engine without any interaction.
+
+    Parameters
+    ----------
+    engine : str
+        The LaTeX engine to use, with any extra arguments.
+    arguments : list[str]
+        The arguments to add.
+    cwd : str
+        The directory in which to run the engine.
+    env : Optional[dict[str, str]]
+        The environment of the engine. Default is the current environment.
+
+    Returns
+    -------
+    int
+        The return code of the engine.
+
+    """
+    command = engine.split() + ["-interaction=nonstopmode"] + arguments
+    with tracing.span("tex", category="latex", command=" ".join(command)):
+        return subprocess.call(command, cwd=cwd or ".", env=env,
+                               stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.STDOUT)
+
+
+def needs_rerun(log_file):
+    """
+    Check whether the engine asked to be run again.
+
+    Parameters
+    ----------
+    log_file : str
+        The log of the last run.
+
+    Returns
+    -------
+    bool
+        Whether the log asks for another run, for example because labels or
+        the number of pages changed.
+
+    """
+    try:
+        with open(log_file, errors="replace") as fin:
+            return RERUN_PATTERN.search(fin.read()) is not None
+    except OSError:
+        return False
+
+
+def recorded_inputs(fls_file, aux_dir):
+    """
+    Read the files the engine read, from the file written with ``-recorder``.
+
+    Parameters
+    ----------
+    fls_file : str
+        The file listing the files read and written by the engine.
+    aux_dir : str
+        The auxiliary directory of the document, whose files are left out.
+
+    Returns
+    -------
+    list[str]|None
+        The files read, relative to the current directory if they are inside
+        it, or None if nothing was recorded.
+
+    """
+    try:
+        with open(fls_file, errors="replace") as fin:
+            lines = fin.read().splitlines()
+    except OSError:
+        return None
+
+    cwd = os.path.abspath(".")
+    pwd = cwd
+    aux_root = posixpath.dirname(os.path.abspath(aux_dir))
+    inputs = set()
+    for line in lines:
+        kind, _, path = line.partition(" ")
+        if kind == "PWD":
+            pwd = path
+        elif kind == "INPUT":
+            path = posixpath.normpath(posixpath.join(pwd, path))
+            if path.startswith(aux_root + "/"):
+                continue
+            if path.startswith(cwd + "/"):
+                path = posixpath.relpath(path, cwd)
+            inputs.add(path)
+    return sorted(inputs)
+
+
+def build_format(engine, build_dir, name, preamble, env=None):
+    """
+    Precompile a preamble into a format file.
+
+    Parameters
+    ----------
+    engine : str
+        The LaTeX engine to use, with any extra arguments.
+    build_dir : str
+        The directory in which the documents using the format are compiled.
+    name : str
+        The name of the format.
+    preamble : str
+        The preamble, up to but excluding ``\\begin{document}``.
+    env : Optional[dict[str, str]]
+        The environment of the engine. Default is the current environment.
+
+    Returns
+    -------
+    str|None
+        The path of the format, without its extension, or None if it could not
+        be built.
+
+    """
+    format_dir = os.path.abspath(posixpath.join(build_dir, config.AUX_DIR,
+                                                config.FORMATS_DIR))
+    os.makedirs(format_dir, exist_ok=True)
+    format_path = posixpath.join(format_dir, name)
+    if os.path.exists(format_path + ".fmt"):
+        return format_path
+
+    with open(format_path + ".tex", "w") as fout:
+        fout.write(preamble + BEGIN_DOCUMENT + "\n\\end{document}\n")
+    returncode = run_engine(engine, [
+        "-ini",
+        "-jobname={}".format(name),
+        "-output-directory={}".format(format_dir),
+        "&{}".format(engine.split()[0]),
+        "mylatexformat.ltx",
+        format_path + ".tex",
+    ], cwd=build_dir, env=env)
+
+    if returncode == 0 and os.path.exists(format_path + ".fmt"):
+        return format_path
+    return None
+
+
+def compile_file(engine, tex_file, format_path=None, env=None):
+    """
+    Compile a single LaTeX file.
+
+    The engine is run inside the directory containing the file, and writes its
+    auxiliary files to a directory of their own. It is run again as long as its
+    log asks for it, up to `config.LATEX_MAX_PASSES` times. The resulting PDF is
+    moved next to the LaTeX file.
+
+    Parameters
+    ----------
+    engine : str
+        The LaTeX engine to use, with any extra arguments.
+    tex_file : str
+        The LaTeX file to compile.
+    format_path : Optional[str]
+        A format containing the precompiled preamble of the file. If compiling
+        with the format fails, the file is compiled again without it. Default
+        is to compile the whole file.
+    env : Optional[dict[str, str]]
+        The environment of the engine. Default is the current environment.
+
+    Returns
+    -------
+    CompileResult
+        The file, the return code of the engine, the log file, the number of
+        times the engine was run, and the files it read, or None if they were
+        not recorded.
+
+    """
+    build_dir, filename = posixpath.split(tex_file)
+    stem = posixpath.splitext(filename)[0]
+    aux_dir = aux_directory(tex_file)
+    log_file = posixpath.join(aux_dir, stem + ".log")
+    os.makedirs(aux_dir, exist_ok=True)
+
+    arguments = ["-recorder",
+                 "-output-directory={}".format(os.path.abspath(aux_dir)),
+                 filename]
+    passes = 0
+    while True:
+        passes += 1
+        if format_path is not None:
+            returncode = run_engine(engine,
+                                    ["-fmt={}".format(format_path)] + arguments,
+                                    cwd=build_dir, env=env)
+            if returncode != 0:
+                format_path = None
+        if format_path is None:
+            returncode = run_engine(engine, arguments, cwd=build_dir, env=env)
+        if (returncode != 0 or passes >= config.LATEX_MAX_PASSES
+                or not needs_rerun(log_file)):
+            break
+
+    pdf_file = posixpath.join(aux_dir, stem + ".pdf")
+    if returncode == 0 and os.path.exists(pdf_file):
+        os.replace(pdf_file, posixpath.join(build_dir, stem + ".pdf"))
+    elif returncode == 0:
+        returncode = -1
+
+    return CompileResult(tex_file, returncode, log_file, passes,
+                         recorded_inputs(posixpath.join(aux_dir, stem + ".fls"),
+                                         aux_dir))
+
+
+def compile_source(engine, source, env=None):
+    """
+    Compile LaTeX source held in memory.
+
+    The source is compiled in a temporary directory, which is removed
+    afterwards.
+
+    Parameters
+    ----------
+    engine : str
+        The LaTeX engine to use, with any extra arguments.
+    source : bytes
+        The LaTeX source.
+    env : Optional[dict[str, str]]
+        The environment of the engine. Default is the current environment.
+
+    Returns
+    -------
+    tuple[bytes|None, str]
+        The PDF, or None if it could not be compiled, and the log of the
+        engine.
+
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        tex_file = posixpath.join(directory, "resume.tex")
+        with open(tex_file, "wb") as fout:
+            fout.write(source)
+        result = compile_file(engine, tex_file, env=env)
+        try:
+            with open(result.log_file, errors="replace") as fin:
+                log = fin.read()
+        except OSError:
+            log = ""
+        if result.returncode != 0:
+            return None, log
+        with open(posixpath.join(directory, "resume.pdf"), "rb") as fin:
+            return fin.read(), log
+
+
+class LatexCompiler(object):
+    """
+    Compiles LaTeX files using a pool of workers.
+
+    Parameters
+    ----------
+    engine : str
+        The LaTeX engine to use.
+    jobs : Optional[int]
+        The number of files to compile at once. Default is 1.
+    precompile_preamble : Optional[bool]
+        Whether to precompile the preamble of the files into a format file,
+        which is reused by all the files sharing that preamble. Default is
+        False.
+    source_date_epoch : Optional[int]
+        The time, in seconds since the epoch, to record in the PDFs, so that
+        compiling the same file gives the same PDF. Default is the current
+        time.
+
+    Attributes
+    ----------
+    engine : str
+        The LaTeX engine to use.
+    env : dict[str, str]|None
+        The environment of the engine, or None for the current environment.
+    jobs : int
+        The number of files to compile at once.
+    precompile_preamble : bool
+        Whether to precompile the preamble of the files.
+
+    """
+    def __init__(self, engine, jobs=1, precompile_preamble=False,
+                 source_date_epoch=None):
+        self.engine = engine
+        self.env = None
+        if source_date_epoch is not None:
+            self.env = engine_environment(source_date_epoch)
+        self.jobs = max(1, jobs)
+        self.precompile_preamble = precompile_preamble
+        self._executor = None
+        self._futures = []
+        self._formats = {}
+
+    def preamble_format(self, tex_file):
+        """
+        Find or build the format for the preamble of a file.
+
+        Formats are named after a hash of the engine and the preamble, so they
+        are rebuilt whenever the preamble template or the theme changes.
+
+        Parameters
+        ----------
+        tex_file : str
+            The LaTeX file.
+
+        Returns
+        -------
+        str|None
+            The path of the format, without its extension, or None if the file
+            has no preamble or the format could not be built.
+
+        """
+        with open(tex_file) as fin:
+            source = fin.read()
+        end = source.find(BEGIN_DOCUMENT)
+        if end < 0:
+            return None
+
+        preamble = source[:end]
+        name = "preamble-{}".format(hashlib.sha256(
+            (self.engine + "\0" + preamble).encode()).hexdigest()[:16])
+        if name not in self._formats:
+            self._formats[name] = build_format(self.engine,
+                                               posixpath.dirname(tex_file),
+                                               name, preamble, env=self.env)
+        return self._formats[name]
+
+    def submit(self, tex_file):
+        """
+        Start compiling a LaTeX file in the background.
+
+        Parameters
+        ----------
+        tex_file : str
+            The LaTeX file to compile.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The eventual CompileResult.
+
+        """
+        if self._executor is None:
+            import concurrent.futures
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self.jobs, thread_name_prefix="latex"
+            )
+        format_path = (self.preamble_format(tex_file)
+                       if self.precompile_preamble else None)
+        future = self._executor.submit(compile_file, self.engine, tex_file,
+                                       format_path, self.env)
+        self._futures.append(future)
+        return future
+
+    def wait(self):
+        """
+        Wait for all the submitted files to finish compiling.
+
+        Returns
+        -------
+        list[CompileResult]
+            The result for each file, in completion order.
+
+        """
+        if not self._futures:
+            return []
+
+        import concurrent.futures
+        results = []
+        try:
+            for future in progress(
+                    concurrent.futures.as_completed(self._futures),
+                    total=len(self._futures), desc="Generating PDFs",
+                    leave=True, unit="pdf"):
+                results.append(future.result())
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = None
+            self._futures = []
+        return results
@@ -0,0 +1,100 @@
+"""
+Loads YAML files.
+
+The C-accelerated safe loader is used when PyYAML was built with it. Parsed
+files can be cached on disk, and are only parsed again when their contents
+change. PyYAML is only imported when a file actually needs parsing.
+
+"""
+import collections
+import hashlib
+import os
+import pickle
+import posixpath
+import threading
+
+import tracing
+
+
+stats = collections.Counter()
+
+
+def safe_loader():
+    """
+    Get the fastest available safe YAML loader.
+
+    Returns
+    -------
+    type
+        The C-accelerated safe loader if available, or else the pure Python one.
+
+    """
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml(filename, cache_dir=None):
+    """
+    Load a YAML file.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the file to load
+    cache_dir : Optional[str]
+        The directory in which to cache the parsed file. Default is not to
+        cache it.
+
+    Returns
+    -------
+    dict
+        The contents of the file.
+
+    Notes
+    -----
+    A cached file is reused if its size and modification time are unchanged,
+    or failing that, if its contents hash the same. Hits and misses are counted
+    in `stats`.
+
+    """
+    with tracing.span("load_yaml", file=filename):
+        if cache_dir is None:
+            import yaml
+            with open(filename, "rb") as fin:
+                return yaml.load(fin, Loader=safe_loader())
+
+        cache_file = posixpath.join(cache_dir, "{}.pickle".format(
+            hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()
+        ))
+        stat = os.stat(filename)
+        try:
+            with open(cache_file, "rb") as fin:
+                cached = pickle.load(fin)
+        except (OSError, pickle.PickleError, EOFError, AttributeError):
+            cached = {}
+
+        if (cached.get("size") == stat.st_size
+                and cached.get("mtime_ns") == stat.st_mtime_ns):
+            stats["hits"] += 1
+            return cached["data"]
+
+        with open(filename, "rb") as fin:
+            contents = fin.read()
+        sha = hashlib.sha256(contents).hexdigest()
+        if cached.get("sha256") == sha:
+            stats["hits"] += 1
+            data = cached["data"]
+        else:
+            stats["misses"] += 1
+            import yaml
+            data = yaml.load(contents, Loader=safe_loader())
+
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_file = "{}.{}.{}.tmp".format(cache_file, os.getpid(),
+                                          threading.get_ident())
+        with open(temp_file, "wb") as fout:
+            pickle.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                         "sha256": sha, "data": data}, fout,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+        return data
@@ -0,0 +1,247 @@
+"""
+Keeps track of what was built, and from what, across runs.
+
+Each output is recorded in a JSON manifest in the build directory together with
+a key summarizing everything it was built from. An output only needs to be
+rebuilt when its key changes.
+
+"""
+import hashlib
+import json
+import os
+import posixpath
+import re
+import time
+
+import config
+
+
+LATEX_DEPENDENCY_PATTERN = re.compile(
+    r"\\(?:input|include|includegraphics|photo)\s*(?:\[[^\]]*\])?\s*"
+    r"{\s*\"?([^}\"]+)\"?\s*}"
+)
+
+
+def file_digest(filename):
+    """
+    Return the SHA-256 hash of a file.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the file to check.
+
+    Returns
+    -------
+    str
+        The hash in hexadecimal, or an empty string if the file does not exist.
+
+    """
+    sha = hashlib.sha256()
+    try:
+        with open(filename, "rb") as fin:
+            for chunk in iter(lambda: fin.read(65536), b""):
+                sha.update(chunk)
+    except OSError:
+        return ""
+    return sha.hexdigest()
+
+
+def file_stamp(filename):
+    """
+    Return the size and modification time of a file.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the file to check.
+
+    Returns
+    -------
+    list[int]|None
+        The modification time in nanoseconds and the size, or None if the file
+        does not exist.
+
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def latex_dependencies(tex_file):
+    """
+    Find the files declared as dependencies of a LaTeX file.
+
+    This covers files which are input or included, as well as images and the
+    photo.
+
+    Parameters
+    ----------
+    tex_file : str
+        The LaTeX file to check.
+
+    Returns
+    -------
+    list[str]
+        The paths of the dependencies, relative to the current directory if the
+        source used relative paths.
+
+    """
+    build_dir = posixpath.dirname(tex_file)
+    with open(tex_file) as fin:
+        source = fin.read()
+
+    dependencies = []
+    for match in LATEX_DEPENDENCY_PATTERN.finditer(source):
+        path = posixpath.join(build_dir, match.group(1).strip())
+        if not os.path.exists(path) and os.path.exists(path + ".tex"):
+            path += ".tex"
+        dependencies.append(path)
+    return sorted(set(dependencies))
+
+
+class BuildManifest(object):
+    """
+    An on-disk record of the outputs built and the keys they were built from.
+
+    Parameters
+    ----------
+    filename : Optional[str]
+        The file holding the manifest. Default is the manifest file in the build
+        directory.
+
+    Attributes
+    ----------
+    entries : dict[str, dict]
+        The recorded outputs.
+
+        **Dictionary format :** {name: {"key": key, "outputs": [filename],
+                                        "dependencies": {filename: stamp}}}
+    filename : str
+        The file holding the manifest.
+    saved_at : float
+        When the manifest was last read or written, by `time.monotonic`.
+
+    """
+    def __init__(self, filename=None):
+        if filename is None:
+            filename = posixpath.join(config.BUILD_DIR, config.MANIFEST_FILE)
+        self.filename = filename
+        try:
+            with open(filename) as fin:
+                self.entries = json.load(fin)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.saved_at = time.monotonic()
+
+    @staticmethod
+    def digest(*parts):
+        """
+        Combine several values into a single key.
+
+        Parameters
+        ----------
+        parts : str|bytes
+            The values to combine.
+
+        Returns
+        -------
+        str
+            The key in hexadecimal.
+
+        """
+        sha = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode()
+            sha.update(hashlib.sha256(part).digest())
+        return sha.hexdigest()
+
+    def is_current(self, name, key):
+        """
+        Check whether an output is up to date.
+
+        Parameters
+        ----------
+        name : str
+            The name of the output.
+        key : str
+            The key the output would be built from.
+
+        Returns
+        -------
+        bool
+            Whether the output was last built from the same key, all the files
+            it produced still exist, and none of the files it depends on
+            changed since.
+
+        """
+        entry = self.entries.get(name)
+        return (entry is not None and entry["key"] == key
+                and all(os.path.exists(f) for f in entry["outputs"])
+                and all(file_stamp(f) == stamp
+                        for f, stamp in entry.get("dependencies", {}).items()))
+
+    def record(self, name, key, outputs, dependencies=()):
+        """
+        Record that an output was built.
+
+        Parameters
+        ----------
+        name : str
+            The name of the output.
+        key : str
+            The key the output was built from.
+        outputs : list[str]
+            The files which were produced.
+        dependencies : Optional[Iterable[str]]
+            Files which were read while building the output, besides those
+            covered by the key. The output is out of date as soon as their size
+            or modification time changes. Default is none.
+
+        """
+        entry = {"key": key, "outputs": list(outputs)}
+        if dependencies:
+            entry["dependencies"] = {f: file_stamp(f) for f in dependencies}
+        self.entries[name] = entry
+
+    def remove(self, name):
+        """
+        Forget an output, if it was recorded.
+
+        Parameters
+        ----------
+        name : str
+            The name of the output.
+
+        """
+        self.entries.pop(name, None)
+
+    def checkpoint(self, interval):
+        """
+        Write the manifest to disk if it was not written recently.
+
+        Writing the whole manifest takes longer as it grows, so long runs only
+        save it now and then, rather than after every batch of outputs.
+
+        Parameters
+        ----------
+        interval : float
+            The minimum number of seconds between writes.
+
+        """
+        if time.monotonic() - self.saved_at >= interval:
+            self.save()
+
+    def save(self):
+        """
+        Write the manifest to disk.
+
+        """
+        temp_file = self.filename + ".tmp"
+        with open(temp_file, "w") as fout:
+            json.dump(self.entries, fout, indent=1, sort_keys=True)
+        os.replace(temp_file, self.filename)
+        self.saved_at = time.monotonic()
@@ -0,0 +1,32 @@
+"""
+Shows progress bars.
+
+tqdm is only imported when a progress bar is actually shown, and progress bars
+can be turned off entirely.
+
+"""
+enabled = True
+
+
+def progress(iterable, **kwargs):
+    """
+    Wrap an iterable in a progress bar, if enabled.
+
+    Parameters
+    ----------
+    iterable : Iterable
+        The items to iterate over.
+    kwargs
+        Options for tqdm.
+
+    Returns
+    -------
+    Iterable
+        The iterable, wrapped in a progress bar if enabled.
+
+    """
+    if not enabled:
+        return iterable
+
+    import tqdm
+    return tqdm.tqdm(iterable, **kwargs)
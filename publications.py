@@ -0,0 +1,549 @@
+"""
+Loads publications from YAML and BibTeX files.
+
+The publications are kept in a store, indexed by year, type, and tag, so that
+each résumé can select some of them without going through the whole list. The
+store can be cached on disk. When a file changes, only the entries which changed
+are processed again, and the rest are taken from the cache.
+
+"""
+import collections
+import hashlib
+import json
+import os
+import pickle
+import posixpath
+import re
+import threading
+
+import config
+import tracing
+
+
+CACHE_VERSION = 1
+MONTHS = {
+    "jan": "January", "feb": "February", "mar": "March", "apr": "April",
+    "may": "May", "jun": "June", "jul": "July", "aug": "August",
+    "sep": "September", "oct": "October", "nov": "November", "dec": "December",
+}
+VENUE_FIELDS = ["journal", "booktitle", "school", "institution", "publisher",
+                "howpublished"]
+VENUE_TYPES = {
+    "inproceedings": "In ",
+    "conference": "In ",
+    "incollection": "In ",
+    "mastersthesis": "Masters thesis, ",
+    "phdthesis": "PhD thesis, ",
+    "techreport": "Technical report, ",
+}
+
+_ENTRY_START = re.compile(r"@\s*(\w+)\s*([{(])")
+_FIELD_NAME = re.compile(r"\s*([^\s=,{}\"#]+)\s*=\s*")
+_BARE_VALUE = re.compile(r"[^\s,#{}\"]+")
+_PROTECTED = re.compile(r"(?<![\\\w])\{([^{}]*)\}")
+
+stats = collections.Counter()
+
+
+class PublicationStore(object):
+    """
+    Publications indexed by year, type, and tag.
+
+    Parameters
+    ----------
+    entries : list[dict]
+        The publications, in the order in which they are listed.
+    index : Optional[dict]
+        The positions of the publications by year, type, and tag, as built by
+        `build_index`. Default is to build it.
+
+    Attributes
+    ----------
+    entries : list[dict]
+        The publications.
+    index : dict[str, dict]
+        The positions of the publications in `entries`, by value, under "year",
+        "type", and "tag".
+
+    """
+    def __init__(self, entries, index=None):
+        self.entries = entries
+        self.index = index if index is not None else self.build_index(entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def build_index(entries):
+        """
+        Index publications by year, type, and tag.
+
+        Parameters
+        ----------
+        entries : list[dict]
+            The publications.
+
+        Returns
+        -------
+        dict[str, dict]
+            The positions of the publications by value, under "year", "type",
+            and "tag".
+
+        """
+        index = {"year": {}, "type": {}, "tag": {}}
+        for position, entry in enumerate(entries):
+            if "year" in entry:
+                index["year"].setdefault(_year(entry["year"]),
+                                         []).append(position)
+            if "type" in entry:
+                index["type"].setdefault(entry["type"], []).append(position)
+            for tag in _as_list(entry.get("tags")):
+                index["tag"].setdefault(tag, []).append(position)
+        return index
+
+    def select(self, years=None, since=None, until=None, types=None,
+               tags=None, limit=None):
+        """
+        Select publications.
+
+        Each criterion narrows down the selection, and only uses the index.
+
+        Parameters
+        ----------
+        years : Optional[Iterable[int]]
+            The years to select. Default is any year.
+        since : Optional[int]
+            The first year to select. Default is any year.
+        until : Optional[int]
+            The last year to select. Default is any year.
+        types : Optional[Iterable[str]]
+            The types of publications to select, such as "article". Default is
+            any type.
+        tags : Optional[Iterable[str]]
+            Select publications with any of these tags. Default is any tag.
+        limit : Optional[int]
+            The maximum number of publications to select. Default is all of
+            them.
+
+        Returns
+        -------
+        list[dict]
+            The selected publications, in the order in which they are listed.
+
+        """
+        positions = None
+
+        def narrow(index, values):
+            nonlocal positions
+            found = set()
+            for value in values:
+                found.update(index.get(value, ()))
+            positions = found if positions is None else positions & found
+
+        if years is not None or since is not None or until is not None:
+            years = None if years is None else set(_as_list(years))
+            narrow(self.index["year"], [
+                year for year in self.index["year"]
+                if (years is None or year in years)
+                and (since is None or (isinstance(year, int) and year >= since))
+                and (until is None or (isinstance(year, int) and year <= until))
+            ])
+        if types is not None:
+            narrow(self.index["type"], _as_list(types))
+        if tags is not None:
+            narrow(self.index["tag"], _as_list(tags))
+
+        if positions is None:
+            selected = list(self.entries)
+        else:
+            selected = [self.entries[position]
+                        for position in sorted(positions)]
+        return selected if limit is None else selected[:limit]
+
+
+def load_publications(yaml_dir=config.YAML_DIR, cache_dir=None):
+    """
+    Load the publications from the YAML and BibTeX publication files.
+
+    Parameters
+    ----------
+    yaml_dir : Optional[str]
+        The directory containing the publication files. Default is the one in
+        the config file.
+    cache_dir : Optional[str]
+        The directory in which to cache the store. Default is not to cache it.
+
+    Returns
+    -------
+    PublicationStore
+        The publications of the YAML file, followed by those of the BibTeX file.
+
+    Notes
+    -----
+    The cached store is reused if the size and modification time of every file
+    are unchanged. Otherwise, files whose contents hash the same are not parsed
+    again, and in the others, only the entries which changed are processed.
+    Processed and reused entries are counted in `stats`.
+
+    """
+    sources = [path for path in (
+        posixpath.join(yaml_dir, config.YAML_PUBLICATIONS + ".yaml"),
+        posixpath.join(yaml_dir, config.YAML_PUBLICATIONS + ".bib"),
+    ) if os.path.exists(path)]
+
+    with tracing.span("load_publications", files=len(sources)):
+        cached = {}
+        if cache_dir is not None:
+            cache_file = posixpath.join(
+                cache_dir, "publications-{}.pickle".format(hashlib.sha256(
+                    os.path.abspath(yaml_dir).encode()
+                ).hexdigest())
+            )
+            try:
+                with open(cache_file, "rb") as fin:
+                    cached = pickle.load(fin)
+            except (OSError, pickle.PickleError, EOFError, AttributeError):
+                pass
+            if cached.get("version") != CACHE_VERSION:
+                cached = {}
+
+        stamps = []
+        for path in sources:
+            stat = os.stat(path)
+            stamps.append([path, stat.st_size, stat.st_mtime_ns])
+        if cached and cached["stamps"] == stamps:
+            stats["reused"] += len(cached["entries"])
+            return PublicationStore(cached["entries"], cached["index"])
+
+        previous = cached.get("processed", {})
+        previous_sources = cached.get("sources", {})
+        processed = {}
+        source_digests = {}
+        entries = []
+        for path in sources:
+            with open(path, "rb") as fin:
+                contents = fin.read()
+            sha = hashlib.sha256(contents).hexdigest()
+            known = previous_sources.get(path)
+            if (known is not None and known["sha256"] == sha
+                    and all(digest in previous for digest in known["digests"])):
+                items = [(digest, None) for digest in known["digests"]]
+            elif path.endswith(".bib"):
+                items = _bibtex_items(contents.decode("utf-8"))
+            else:
+                items = _yaml_items(contents)
+
+            digests = []
+            for digest, process in items:
+                if digest in previous:
+                    stats["reused"] += 1
+                    publication = previous[digest]
+                else:
+                    stats["processed"] += 1
+                    publication = process()
+                processed[digest] = publication
+                digests.append(digest)
+                entries.append(publication)
+            source_digests[path] = {"sha256": sha, "digests": digests}
+
+        store = PublicationStore(entries)
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_file = "{}.{}.{}.tmp".format(cache_file, os.getpid(),
+                                              threading.get_ident())
+            with open(temp_file, "wb") as fout:
+                pickle.dump({"version": CACHE_VERSION, "stamps": stamps,
+                             "sources": source_digests,
+                             "processed": processed, "entries": entries,
+                             "index": store.index}, fout,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, cache_file)
+        return store
+
+
+def _yaml_items(contents):
+    """
+    List the entries of a YAML publication file.
+
+    Parameters
+    ----------
+    contents : bytes
+        The contents of the file.
+
+    Returns
+    -------
+    list[tuple[str, callable]]
+        The hash of each entry, and a function processing it.
+
+    """
+    import yaml
+    from loader import safe_loader
+    items = []
+    for entry in yaml.load(contents, Loader=safe_loader()) or []:
+        digest = hashlib.sha256(json.dumps(entry, sort_keys=True,
+                                           default=str).encode()).hexdigest()
+        items.append((digest, lambda entry=entry: _from_yaml(entry)))
+    return items
+
+
+def _from_yaml(entry):
+    """
+    Process an entry of a YAML publication file.
+
+    Tags given as a single string are made into a list.
+
+    """
+    publication = dict(entry)
+    if "tags" in publication:
+        publication["tags"] = _as_list(publication["tags"])
+    return publication
+
+
+def _bibtex_items(text):
+    """
+    List the entries of a BibTeX file.
+
+    Only the boundaries of the entries are found here. Their fields are parsed
+    when they are processed.
+
+    Parameters
+    ----------
+    text : str
+        The contents of the file.
+
+    Returns
+    -------
+    list[tuple[str, callable]]
+        The hash of each entry, including the string definitions it may use,
+        and a function processing it.
+
+    """
+    strings = dict(MONTHS)
+    chunks = []
+    for entry_type, body in _split_bibtex(text):
+        if entry_type == "string":
+            name, value = _parse_fields(body, strings)[0]
+            strings[name] = value
+        elif entry_type not in ("comment", "preamble"):
+            chunks.append((entry_type, body))
+
+    strings_digest = hashlib.sha256(json.dumps(strings, sort_keys=True)
+                                    .encode()).hexdigest()
+    return [(hashlib.sha256((strings_digest + entry_type + body).encode())
+             .hexdigest(),
+             lambda entry_type=entry_type, body=body:
+             _from_bibtex(entry_type, body, strings))
+            for entry_type, body in chunks]
+
+
+def _split_bibtex(text):
+    """
+    Split a BibTeX file into entries.
+
+    Parameters
+    ----------
+    text : str
+        The contents of the file.
+
+    Yields
+    ------
+    tuple[str, str]
+        The type of each entry, in lower case, and its contents between the
+        outer delimiters.
+
+    """
+    position = 0
+    while True:
+        match = _ENTRY_START.search(text, position)
+        if match is None:
+            return
+        closing = "}" if match.group(2) == "{" else ")"
+        depth = 0
+        end = match.end()
+        while end < len(text):
+            char = text[end]
+            if char == "{":
+                depth += 1
+            elif char == "}" and depth:
+                depth -= 1
+            elif char == closing and not depth:
+                break
+            end += 1
+        yield match.group(1).lower(), text[match.end():end]
+        position = end + 1
+
+
+def _parse_fields(body, strings):
+    """
+    Parse the fields of a BibTeX entry.
+
+    Parameters
+    ----------
+    body : str
+        The fields, separated by commas.
+    strings : dict[str, str]
+        The values of the string macros.
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        The name of each field, in lower case, and its value.
+
+    """
+    fields = []
+    position = 0
+    while True:
+        match = _FIELD_NAME.match(body, position)
+        if match is None:
+            return fields
+        parts = []
+        position = match.end()
+        while True:
+            position = _skip_spaces(body, position)
+            if position >= len(body):
+                break
+            if body[position] in "{\"":
+                end = _closing_delimiter(body, position)
+                parts.append(body[position + 1:end])
+                position = end + 1
+            else:
+                bare = _BARE_VALUE.match(body, position)
+                if bare is None:
+                    break
+                value = bare.group()
+                parts.append(strings.get(value.lower(), value))
+                position = bare.end()
+            position = _skip_spaces(body, position)
+            if position < len(body) and body[position] == "#":
+                position += 1
+            else:
+                break
+        fields.append((match.group(1).lower(),
+                       " ".join("".join(parts).split())))
+        position = _skip_spaces(body, position)
+        if position < len(body) and body[position] == ",":
+            position += 1
+
+
+def _skip_spaces(text, position):
+    while position < len(text) and text[position].isspace():
+        position += 1
+    return position
+
+
+def _closing_delimiter(text, position):
+    """
+    Find the end of a braced or quoted BibTeX value.
+
+    Parameters
+    ----------
+    text : str
+        The text containing the value.
+    position : int
+        The position of its opening brace or quote.
+
+    Returns
+    -------
+    int
+        The position of its closing brace or quote.
+
+    """
+    closing = "}" if text[position] == "{" else "\""
+    depth = 0
+    for end in range(position + 1, len(text)):
+        char = text[end]
+        if char == closing and not depth:
+            return end
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+    return len(text)
+
+
+def _from_bibtex(entry_type, body, strings):
+    """
+    Process a BibTeX entry into a publication, as in the YAML file.
+
+    Parameters
+    ----------
+    entry_type : str
+        The type of the entry, in lower case.
+    body : str
+        The citation key and fields of the entry.
+    strings : dict[str, str]
+        The values of the string macros.
+
+    Returns
+    -------
+    dict
+        The publication. The citation key is under "key", the type of entry
+        under "type", and the keywords under "tags".
+
+    """
+    key, _, body = body.partition(",")
+    fields = dict(_parse_fields(body, strings))
+
+    publication = {
+        "title": _PROTECTED.sub(r"\1", fields.get("title", "")),
+        "authors": _authors(fields.get("author") or fields.get("editor", "")),
+        "year": _year(fields.get("year", "")),
+        "venuetype": VENUE_TYPES.get(entry_type, ""),
+        "venue": next((_PROTECTED.sub(r"\1", fields[name])
+                       for name in VENUE_FIELDS if name in fields), ""),
+        "key": key.strip(),
+        "type": entry_type,
+    }
+    if "month" in fields:
+        publication["month"] = MONTHS.get(fields["month"].lower()[:3],
+                                          fields["month"])
+    if "url" in fields:
+        publication["url"] = fields["url"]
+    elif "doi" in fields:
+        publication["url"] = "https://doi.org/" + fields["doi"]
+    if "abstract" in fields:
+        publication["abstract"] = fields["abstract"]
+    if "keywords" in fields:
+        publication["tags"] = [tag.strip() for tag in
+                               re.split(r"[,;]", fields["keywords"])
+                               if tag.strip()]
+    return publication
+
+
+def _authors(names):
+    """
+    List BibTeX names in reading order.
+
+    "Last, First and Other, Some" becomes "First Last and Some Other", and
+    longer lists are separated by commas.
+
+    """
+    names = [" ".join(reversed([part.strip()
+                                for part in name.split(",", 1)]))
+             for name in re.split(r"\s+and\s+", names) if name.strip()]
+    if len(names) <= 2:
+        return " and ".join(names)
+    return "{}, and {}".format(", ".join(names[:-1]), names[-1])
+
+
+def _year(year):
+    """
+    Make a year into a number if possible, so that years can be compared.
+
+    """
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return year
+
+
+def _as_list(values):
+    """
+    Make a single value, or no value, into a list.
+
+    """
+    if values is None:
+        return []
+    if isinstance(values, (str, int)):
+        return [values]
+    return list(values)
@@ -0,0 +1,110 @@
+"""
+Publishes built files to the output directory.
+
+Files are only published when they changed since they were last published.
+Where the filesystem allows it, published files are hard links or reflinks to
+the built files rather than copies, and they are always replaced atomically.
+
+"""
+import os
+import posixpath
+import shutil
+
+
+FICLONE = 0x40049409
+
+
+def reflink(source, destination):
+    """
+    Make a copy-on-write clone of a file, on filesystems supporting it.
+
+    Parameters
+    ----------
+    source : str
+        The file to clone.
+    destination : str
+        The clone to create.
+
+    Returns
+    -------
+    bool
+        Whether the clone was created.
+
+    """
+    try:
+        import fcntl
+    except ImportError:  # not available on Windows
+        return False
+    try:
+        with open(source, "rb") as fin, open(destination, "wb") as fout:
+            fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def is_published(source, destination):
+    """
+    Check whether a file was already published.
+
+    Parameters
+    ----------
+    source : str
+        The built file.
+    destination : str
+        The published file.
+
+    Returns
+    -------
+    bool
+        Whether the published file is a link to the built file, or has the
+        same size and modification time.
+
+    """
+    try:
+        published = os.stat(destination)
+    except FileNotFoundError:
+        return False
+    built = os.stat(source)
+    return (os.path.samestat(built, published)
+            or (built.st_size == published.st_size
+                and built.st_mtime_ns == published.st_mtime_ns))
+
+
+def publish_file(source, destination):
+    """
+    Publish a file, unless it was already published.
+
+    The file is hard linked if possible, then reflinked, then copied, to a
+    temporary file next to the destination, which is then renamed.
+
+    Parameters
+    ----------
+    source : str
+        The built file.
+    destination : str
+        The published file.
+
+    Returns
+    -------
+    bool
+        Whether the file was published.
+
+    """
+    if is_published(source, destination):
+        return False
+
+    directory, filename = posixpath.split(destination)
+    temp_file = posixpath.join(directory, ".{}.tmp".format(filename))
+    if os.path.lexists(temp_file):
+        os.remove(temp_file)
+    try:
+        os.link(source, temp_file)
+    except OSError:
+        if not reflink(source, temp_file):
+            shutil.copy2(source, temp_file)
+    os.replace(temp_file, destination)
+    return True
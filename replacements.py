@@ -0,0 +1,59 @@
+"""
+Performs the replacements which change LaTeX formatting to that of a context.
+
+"""
+import functools
+import re
+
+
+class Replacer(object):
+    """
+    Performs a set of regular expression replacements.
+
+    The patterns are compiled once. A single expression combining all of them
+    is used to skip strings which need no replacement at all, which is the case
+    for most strings in a résumé. The other strings have each replacement
+    applied in turn, so that replacements can act on the output of the previous
+    ones, and nested formatting such as ``\\textit{\\textbf{text}}`` is handled
+    in the same way as with separate substitutions. Results are memoized per
+    input string.
+
+    Parameters
+    ----------
+    replacements : dict[str, str]
+        The patterns to replace, in the order in which to replace them, and
+        their replacements.
+    cache_size : Optional[int]
+        The number of results to keep. Default is 65536.
+
+    """
+    def __init__(self, replacements, cache_size=65536):
+        self._rules = [(re.compile(pattern), replacement)
+                       for pattern, replacement in replacements.items()]
+        if self._rules:
+            self._any = re.compile("|".join("(?:{})".format(pattern)
+                                            for pattern in replacements))
+        else:
+            self._any = None
+        self.replace = functools.lru_cache(maxsize=cache_size)(self._replace)
+
+    def _replace(self, text):
+        """
+        Perform the replacements on a string.
+
+        Parameters
+        ----------
+        text : str
+            The string to modify.
+
+        Returns
+        -------
+        str
+            The modified string.
+
+        """
+        if self._any is None or not self._any.search(text):
+            return text
+        for pattern, replacement in self._rules:
+            text = pattern.sub(replacement, text)
+        return text
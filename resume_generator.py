@@ -4,42 +4,33 @@ Generates LaTeX, Markdown, and HTML copies of my résumé.
 More information is available in the README file.
 
 """
-import copy
+import collections
+import filecmp
 import glob
 import hashlib
+import json
 import os
 import posixpath
-import re
 import shutil
-import subprocess
+import sys
+import threading
 import time
-
-import git
-import jinja2
-import tqdm
-import yaml
+import traceback
+import types
 
 import config
+import gitdate
+import loader
+import tracing
 from contexts import CONTEXTS
-
-
-def load_yaml(filename):
-    """
-    Load a YAML file.
-
-    Parameters
-    ----------
-    filename : str
-        The name of the file to load
-
-    Returns
-    -------
-    dict
-        The contents of the file.
-
-    """
-    with open(filename) as file:
-        return yaml.load(file)
+from businesses import chunked, iter_businesses
+from latex_compiler import compile_source, engine_environment, LatexCompiler
+from loader import load_yaml
+from manifest import BuildManifest, file_digest, latex_dependencies
+from progress import progress
+from publications import load_publications, PublicationStore
+from publish import publish_file
+from replacements import Replacer
 
 
 def files_of_type(ext, directory="."):
@@ -62,72 +53,397 @@ def files_of_type(ext, directory="."):
     yield from glob.iglob("{}/*{}".format(directory, ext))
 
 
-def environment_setup():
+def environment_setup(build_dir=config.BUILD_DIR,
+                      output_dir=config.OUTPUT_DIR):
     """
     Create the build and output directories if they don't exist.
 
+    Parameters
+    ----------
+    build_dir : Optional[str]
+        The build directory. Default is the one in the config file.
+    output_dir : Optional[str]
+        The output directory. Default is the one in the config file.
+
     """
-    os.makedirs(config.BUILD_DIR, exist_ok=True)
-    os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+    os.makedirs(build_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+
+BODY_MARKER = "\0body\0"
+_renderers = {}
 
 
-def md5(filename):
+def get_renderer(context_name, cache_dir=None):
     """
-    Return the MD5 hash of a file.
+    Get the renderer of a context shared by the whole process.
 
     Parameters
     ----------
-    filename : str
-        The name of the file to check.
+    context_name : str
+        The name of the context.
+    cache_dir : Optional[str]
+        The directory in which compiled templates are kept. Default is not to
+        keep them.
+
+    Returns
+    -------
+    ContextRenderer
+        The renderer, created the first time it is needed.
+
+    """
+    key = (context_name, cache_dir)
+    if key not in _renderers:
+        _renderers[key] = ContextRenderer(**CONTEXTS[context_name],
+                                          cache_dir=cache_dir)
+    return _renderers[key]
+
+
+def render_context(context_name, data, cache_dir=None):
+    """
+    Render the résumé for a context in a worker process.
+
+    Each worker keeps its own renderers, so the templates of a context are only
+    loaded and compiled once per worker.
+
+    Parameters
+    ----------
+    context_name : str
+        The name of the context to render.
+    data : dict
+        The data to render. The worker has its own copy of it.
+    cache_dir : Optional[str]
+        The directory in which compiled templates are kept. Default is not to
+        keep them.
 
     Returns
     -------
     str
-        The MD5 hash in hexadecimal.
+        The rendered résumé.
 
     """
-    with open(filename) as fin:
-        return hashlib.md5(fin.read().encode()).hexdigest()
+    return get_renderer(context_name, cache_dir).render_resume(data)
 
 
-def hash_map(ext=".tex"):
+def render(data, context_names=("latex",), pdf=False, business=None,
+           cache_dir=None, show_progress=False, source_date_epoch=None):
     """
-    Generate a dictionary of all files of a given type and their hashes.
+    Render a résumé, or a cover letter, in memory.
+
+    The renderers are shared by the whole process, so templates are only
+    loaded and compiled on the first call. Nothing is written to disk, except
+    to compile the PDF.
 
     Parameters
     ----------
-    ext : Optional[str]
-        The extension to search for. Default is ".tex".
+    data : Mapping
+        The résumé data, as in the main YAML file. The publications are taken
+        from it, rather than from the publications file. It is not modified.
+    context_names : Optional[Iterable[str]]
+        The names of the formats to render. Default is LaTeX only.
+    pdf : Optional[bool]
+        Whether to also compile the LaTeX résumé into a PDF. Default is False.
+    business : Optional[dict]
+        The business to write a cover letter to, as in the business file.
+        Cover letters only exist in LaTeX. Default is to render the résumé.
+    cache_dir : Optional[str]
+        The directory in which compiled templates and rendered sections are
+        kept between processes. Default is to only keep them in memory.
+    show_progress : Optional[bool]
+        Whether to show progress bars, if they are enabled. Default is False.
+    source_date_epoch : Optional[int]
+        The time at which the résumé was last updated, in seconds since the
+        epoch, which is given to the LaTeX engine. Default is to take it from
+        the "last_updated_method" if the data has no "updated" date, and not
+        to give any otherwise.
 
     Returns
     -------
-    dict[str, str]
-        A list of filenames with their md5 hash.
+    dict[str, bytes]
+        The résumé or letter in each format, by the name of the format, and
+        the PDF under "pdf" if requested.
 
-        **Dictionary format :** {filename: md5}
+    Raises
+    ------
+    ValueError
+        If a cover letter is requested in another format than LaTeX.
+    RuntimeError
+        If the PDF could not be compiled.
 
     """
-    return {f: md5(f) for f in files_of_type(ext, config.BUILD_DIR)}
+    context_names = list(context_names)
+    if pdf and "latex" not in context_names:
+        context_names.append("latex")
+    if business is not None and context_names != ["latex"]:
+        raise ValueError("cover letters are only written in LaTeX")
+
+    if "updated" not in data:
+        if source_date_epoch is None:
+            source_date_epoch = updated_timestamp(data["last_updated_method"])
+        data = dict(data, updated=format_date(source_date_epoch))
+    if "publications" not in data:
+        data = dict(data, order=[item for item in data["order"]
+                                 if "publications" not in item])
+    if business is not None:
+        data = dict(data, pwd=posixpath.abspath(".").replace("\\", "/"))
+    data = types.MappingProxyType(data)
+
+    outputs = {}
+    for context_name in context_names:
+        context = get_renderer(context_name, cache_dir)
+        with tracing.span("render", context=context_name):
+            if business is None:
+                pieces = context.stream_resume(data, show_progress)
+            else:
+                prepared = context.prepare(data)
+                pieces = context.stream_document(
+                    prepared, context.render_body(prepared, show_progress),
+                    business=dict(business, body=context.render_template(
+                        config.LETTER_FILE_NAME, dict(data, business=business)
+                    ))
+                )
+            outputs[context_name] = "".join(pieces).encode()
+
+    if pdf:
+        env = None
+        if source_date_epoch is not None:
+            env = engine_environment(source_date_epoch)
+        outputs["pdf"], log = compile_source(data["engine"],
+                                             outputs["latex"], env=env)
+        if outputs["pdf"] is None:
+            raise RuntimeError("could not compile the résumé:\n{}"
+                               .format(log[-2000:]))
+    return outputs
+
+
+def add_publications(data, yaml_dir=config.YAML_DIR, cache_dir=None):
+    """
+    Fill or remove the publication section, if available.
+
+    Parameters
+    ----------
+    data : dict
+        The résumé data. It is not modified.
+    yaml_dir : Optional[str]
+        The directory containing the publication files. Default is the one in
+        the config file.
+    cache_dir : Optional[str]
+        The directory in which parsed publications are kept. Default is not to
+        keep them.
+
+    Returns
+    -------
+    dict
+        The data, with the publications from the publication files if it has
+        none of its own, selected with the criteria of `PublicationStore.select`
+        under "publication_filter" if any, and without the publication section
+        if there are none.
+
+    """
+    if not any("publications" in item for item in data["order"]):
+        return data
+
+    criteria = data.get("publication_filter") or {}
+    if "publications" in data:
+        if not criteria:
+            return data
+        store = PublicationStore(data["publications"])
+    else:
+        store = load_publications(yaml_dir, cache_dir=cache_dir)
+
+    with tracing.span("select_publications", publications=len(store)):
+        pubs = store.select(**criteria)
+    if pubs:
+        return dict(data, publications=pubs)
+    return dict(data, order=[item for item in data["order"]
+                             if "publications" not in item])
+
+
+def updated_timestamp(method, yaml_dir=config.YAML_DIR):
+    """
+    Determine the time at which the résumé was last updated.
+
+    Parameters
+    ----------
+    method : str
+        Either "git", to use the time of the latest commit, "inputs", to use
+        the time the input files were last modified, or "time", to use the
+        current time.
+    yaml_dir : Optional[str]
+        The directory containing the input files. Default is the one in the
+        config file.
+
+    Returns
+    -------
+    int
+        The time in seconds since the epoch.
+
+    Notes
+    -----
+    If the ``SOURCE_DATE_EPOCH`` environment variable is set, it is used
+    instead, as in reproducible builds.
+
+    """
+    if "SOURCE_DATE_EPOCH" in os.environ:
+        return int(os.environ["SOURCE_DATE_EPOCH"])
+    if method == "git":
+        with tracing.span("git lookup"):
+            return int(gitdate.committed_date(yaml_dir))
+    elif method == "inputs":
+        return int(max(os.stat(file).st_mtime
+                       for file in glob.iglob(posixpath.join(yaml_dir, "*"))))
+    elif method == "time":
+        return int(time.time())
+    raise ValueError("unknown last_updated_method: {!r}".format(method))
+
+
+def format_date(timestamp):
+    """
+    Format the date on which the résumé was last updated.
+
+    Parameters
+    ----------
+    timestamp : int
+        The time in seconds since the epoch.
+
+    Returns
+    -------
+    str
+        The formatted date, in UTC if ``SOURCE_DATE_EPOCH`` is set, and in the
+        local time zone otherwise.
+
+    """
+    if "SOURCE_DATE_EPOCH" in os.environ:
+        return time.strftime(config.DATE_FMT, time.gmtime(timestamp))
+    return time.strftime(config.DATE_FMT, time.localtime(timestamp))
+
+
+def updated_date(method):
+    """
+    Determine the date on which the résumé was last updated.
+
+    Parameters
+    ----------
+    method : str
+        The method to use; see `updated_timestamp`.
+
+    Returns
+    -------
+    str
+        The formatted date.
+
+    """
+    return format_date(updated_timestamp(method))
 
 
 class ResumeGenerator(object):
     """
     Generates résumés.
 
+    Parameters
+    ----------
+    yaml_dir : Optional[str]
+        The directory containing the input files. Default is the one in the
+        config file.
+    build_dir : Optional[str]
+        The directory in which files are rendered and compiled. Default is the
+        one in the config file.
+    output_dir : Optional[str]
+        The directory to which the results are published. Default is the one
+        in the config file.
+    businesses_file : Optional[str]
+        The file containing the businesses to write cover letters to. Default is
+        the business YAML file in the input directory.
+    precompile_preamble : Optional[bool]
+        Whether to precompile the LaTeX preamble shared by the résumé and
+        cover letters into a format file. Default is False.
+
     Attributes
     ----------
+    build_dir : str
+        The directory in which files are rendered and compiled.
+    businesses_file : str
+        The file containing the businesses to write cover letters to.
+    businesses_cache_dir : str|None
+        The directory in which the business file is cached, if it is the
+        default one, which has a single document.
+    compiler : LatexCompiler|None
+        The compiler to which LaTeX files are handed as soon as they are
+        written, when compiling while rendering.
     data : dict
         The contents of the main YAML file.
-    starting_hashes : dict[str, str]
-        A list of all tex files with their MD5 hash before running.
+    failed_pdfs : set[str]
+        The PDFs which could not be compiled in the last build, and so are not
+        published.
+    letter_stems : set[str]|None
+        The names of the cover letter files, without extensions, if cover
+        letters were generated.
+    manifest : BuildManifest
+        The outputs built in previous runs, and what they were built from.
+    output_dir : str
+        The directory to which the results are published.
+    precompile_preamble : bool
+        Whether to precompile the LaTeX preamble into a format file.
+    quiet : bool
+        Whether to leave out the summary printed after each build.
+    source_date_epoch : int
+        The time at which the résumé was last updated, in seconds since the
+        epoch, which is also given to the LaTeX engine.
+    stats : collections.Counter
+        The number of files rendered, skipped, compiled, failed, deduplicated,
+        published, and pruned.
+    yaml_cache_dir : str
+        The directory in which parsed YAML files are cached.
+    yaml_dir : str
+        The directory containing the input files.
 
     """
-    def __init__(self):
-        self.data = load_yaml(posixpath.join(config.YAML_DIR,
-                                             config.YAML_MAIN + ".yaml"))
-        self.starting_hashes = hash_map()
+    def __init__(self, businesses_file=None, precompile_preamble=False,
+                 quiet=False, *, yaml_dir=config.YAML_DIR,
+                 build_dir=config.BUILD_DIR, output_dir=config.OUTPUT_DIR):
+        self.yaml_dir = yaml_dir
+        self.build_dir = build_dir
+        self.output_dir = output_dir
+        self.yaml_cache_dir = posixpath.join(build_dir, config.CACHE_DIR,
+                                             config.YAML_CACHE_DIR)
+        self.businesses_cache_dir = None
+        if businesses_file is None:
+            businesses_file = posixpath.join(yaml_dir,
+                                             config.YAML_BUSINESSES + ".yaml")
+            self.businesses_cache_dir = self.yaml_cache_dir
+        self.businesses_file = businesses_file
+        self.precompile_preamble = precompile_preamble
+        self.quiet = quiet
+        self.stats = collections.Counter()
+        self.letter_stems = None
+        self.data = None
+        self.source_date_epoch = None
+        self.load()
+        self.manifest = BuildManifest(posixpath.join(build_dir,
+                                                     config.MANIFEST_FILE))
+        self.compiler = None
+        self.failed_pdfs = set()
+        self._compile_keys = {}
+        self._compile_groups = {}
+        self._built = {}
+
+    def load(self):
+        """
+        Load the main YAML file.
 
-    def run(self, context_names, no_letters=True):
+        The date of the last update is determined once, and shared by every
+        résumé, cover letter, and PDF.
+
+        """
+        self.data = load_yaml(posixpath.join(self.yaml_dir,
+                                             config.YAML_MAIN + ".yaml"),
+                              cache_dir=self.yaml_cache_dir)
+        self.source_date_epoch = updated_timestamp(
+            self.data["last_updated_method"], self.yaml_dir)
+        self.data["updated"] = format_date(self.source_date_epoch)
+
+    def run(self, context_names, no_letters=True, jobs=1, cache=False,
+            watch=False, pipeline=False):
         """
         Generate the résumé in various formats.
 
@@ -137,45 +453,247 @@ class ResumeGenerator(object):
             The names of the renderers for the formats to use.
         no_letters : bool
             Whether to generate cover letters with LaTeX.
+        jobs : Optional[int]
+            The number of contexts to render, or LaTeX files to compile, at
+            once. Default is 1.
+        cache : Optional[bool]
+            Whether to keep compiled templates between runs. Default is False.
+        watch : Optional[bool]
+            Whether to keep running, and regenerate the résumé whenever the
+            inputs or templates change. Default is False.
+        pipeline : Optional[bool]
+            Whether to compile LaTeX files as soon as they are rendered, while
+            the rest are still being rendered. Default is False.
+
+        """
+        cache_dir = (posixpath.join(self.build_dir, config.CACHE_DIR)
+                     if cache else None)
+        context_map = {context_name: ContextRenderer(**CONTEXTS[context_name],
+                                                     cache_dir=cache_dir)
+                       for context_name in context_names}
+        self.build(context_map, no_letters=no_letters, jobs=jobs,
+                   pipeline=pipeline)
+        if watch:
+            self.watch(context_map, no_letters=no_letters, jobs=jobs,
+                       pipeline=pipeline)
+
+    def build(self, context_map, no_letters=True, jobs=1, pipeline=False):
+        """
+        Render, compile, and copy the résumé for the given contexts.
+
+        Parameters
+        ----------
+        context_map : dict[str, ContextRenderer]
+            The renderers for the formats to use, by name.
+        no_letters : bool
+            Whether to generate cover letters with LaTeX.
+        jobs : Optional[int]
+            The number of contexts to render, or LaTeX files to compile, at
+            once. Default is 1.
+        pipeline : Optional[bool]
+            Whether to compile LaTeX files as soon as they are rendered. Default
+            is False.
 
         """
-        context_map = {context_name: ContextRenderer(**CONTEXTS[context_name])
-                    for context_name in context_names}
         output_types = set(context.output_filetype
                            if context.output_filetype is not None
                            else context.filetype
                            for context in context_map.values())
         self.handle_publications()
-        self.generate_resumes(context_map.values())
+        if pipeline and "latex" in context_map:
+            self.compiler = LatexCompiler(
+                self.data["engine"], jobs=jobs,
+                precompile_preamble=self.precompile_preamble,
+                source_date_epoch=self.source_date_epoch
+            )
 
-        if "latex" in context_names:
-            if no_letters:
-                self.generate_cover_letters(context_map["latex"])
-            self.compile_latex()
+        try:
+            with tracing.span("generate_resumes"):
+                self.generate_resumes(list(context_map.values()), jobs=jobs)
+
+            if "latex" in context_map:
+                if no_letters:
+                    with tracing.span("generate_cover_letters"):
+                        self.generate_cover_letters(context_map["latex"])
+                with tracing.span("compile_latex"):
+                    self.compile_latex(jobs=jobs)
+        finally:
+            self.compiler = None
+
+        self.manifest.save()
+        with tracing.span("copy_to_output_dir"):
+            self.copy_to_output_dir(output_types)
+        if not self.quiet:
+            print(self.summary())
+
+    def summary(self):
+        """
+        Summarize what was done so far.
 
-        self.copy_to_output_dir(output_types)
+        Returns
+        -------
+        str
+            The number of files rendered, skipped, compiled, passes of the
+            LaTeX engine, files failed, not compiled as duplicates, published,
+            and pruned, and the use of the YAML cache.
+
+        """
+        return ("{} rendered, {} up to date, {} compiled in {} passes, "
+                "{} failed, {} duplicates, {} published, {} pruned; "
+                "YAML cache: {} hits, {} misses"
+                .format(self.stats["rendered"], self.stats["up_to_date"],
+                        self.stats["compiled"], self.stats["passes"],
+                        self.stats["failed"],
+                        self.stats["duplicates"], self.stats["published"],
+                        self.stats["pruned"],
+                        loader.stats["hits"], loader.stats["misses"]))
+
+    def watch(self, context_map, no_letters=True, jobs=1, pipeline=False):
+        """
+        Regenerate the résumé whenever the inputs or templates change.
+
+        Only the contexts affected by a change are regenerated, and the
+        renderers are kept between changes, while the summary printed after
+        each build only counts that build. This runs until interrupted.
+
+        Parameters
+        ----------
+        context_map : dict[str, ContextRenderer]
+            The renderers for the formats to use, by name.
+        no_letters : bool
+            Whether to generate cover letters with LaTeX.
+        jobs : Optional[int]
+            The number of contexts to render, or LaTeX files to compile, at
+            once. Default is 1.
+        pipeline : Optional[bool]
+            Whether to compile LaTeX files as soon as they are rendered. Default
+            is False.
+
+        """
+        directories = [self.yaml_dir, config.TEMPLATES_DIR]
+        import watcher
+        file_watcher = watcher.watch(directories)
+        print("Watching {} for changes. Press Ctrl+C to stop."
+              .format(" and ".join(directories)))
+        try:
+            for changed in file_watcher.changes():
+                affected = self.affected_contexts(changed, context_map,
+                                                  yaml_dir=self.yaml_dir)
+                if not affected:
+                    continue
+
+                self.stats.clear()
+                loader.stats.clear()
+                try:
+                    if any(path.startswith(self.yaml_dir + "/")
+                           for path in changed):
+                        self.load()
+                    for context_name in affected:
+                        context_map[context_name].refresh()
+                    self.build({context_name: context_map[context_name]
+                                for context_name in affected},
+                               no_letters=no_letters, jobs=jobs,
+                               pipeline=pipeline)
+                except Exception:
+                    traceback.print_exc()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            file_watcher.close()
+
+    @staticmethod
+    def affected_contexts(changed, context_names, yaml_dir=config.YAML_DIR):
+        """
+        Determine which contexts are affected by changes to files.
+
+        Parameters
+        ----------
+        changed : Iterable[str]
+            The files which changed.
+        context_names : Iterable[str]
+            The names of the contexts in use.
+        yaml_dir : Optional[str]
+            The directory containing the input files. Default is the one in the
+            config file.
+
+        Returns
+        -------
+        list[str]
+            The names of the contexts to regenerate.
+
+        """
+        context_names = list(context_names)
+        affected = set()
+        for path in changed:
+            path = posixpath.normpath(path)
+            parts = path.split("/")
+            if (path.startswith(posixpath.normpath(yaml_dir) + "/")
+                    and path.endswith((".yaml", ".bib"))):
+                if parts[-1] == config.YAML_BUSINESSES + ".yaml":
+                    affected.add("latex")
+                else:
+                    affected.update(context_names)
+            elif parts[0] == config.TEMPLATES_DIR and len(parts) > 2:
+                affected.add(parts[1])
+        return [context_name for context_name in context_names
+                if context_name in affected]
 
     def handle_publications(self):
         """
         Fill or remove the publication section, if available.
 
         """
-        if not any("publications" in item for item in self.data["order"]):
-            return
+        self.data = add_publications(self.data, self.yaml_dir,
+                                     self.yaml_cache_dir)
 
-        if "publications" not in self.data:
-            pubs = load_yaml(
-                posixpath.join(config.YAML_DIR,
-                               config.YAML_PUBLICATIONS + ".yaml"))
-            if pubs:
-                self.data["publications"] = pubs
-            else:
-                for item in self.data["order"]:
-                    if "publications" in item:
-                        self.data["order"].remove(item)
-                        break
+    def data_key(self, data):
+        """
+        Summarize the data used to render a résumé.
+
+        Parameters
+        ----------
+        data : dict
+            The data to summarize.
+
+        Returns
+        -------
+        str
+            A key which changes whenever the data changes.
+
+        """
+        return self.manifest.digest(json.dumps(data, sort_keys=True,
+                                               default=str))
+
+    def resume_key(self, context, base, data_key, business=None):
+        """
+        Identify a résumé and what it is rendered from.
+
+        Parameters
+        ----------
+        context : ContextRenderer
+            The renderer to use.
+        base : str
+            The root filename for the résumé.
+        data_key : str
+            The key of the data to render.
+        business : Optional[dict]
+            The business to address a cover letter to. Default is to not include
+            a cover letter.
+
+        Returns
+        -------
+        tuple[str, str]
+            The name of the résumé in the manifest, and its key.
 
-    def process_resume(self, context, base=config.BASE_FILE_NAME):
+        """
+        return (posixpath.join(context.context_name, base),
+                self.manifest.digest(
+                    context.fingerprint, data_key,
+                    json.dumps(business, sort_keys=True, default=str),
+                ))
+
+    def process_resume(self, context, base=config.BASE_FILE_NAME,
+                       business=None, render=None, data_key=None):
         """
         Render and save a résumé.
 
@@ -186,12 +704,48 @@ class ResumeGenerator(object):
         base : str
             The root filename for the résumé. The user's name would be prepended
             to this.
+        business : Optional[dict]
+            The business to address a cover letter to. Default is to not include
+            a cover letter.
+        render : Optional[callable]
+            A function rendering the résumé for the business. Default is to
+            render the résumé from scratch with the context.
+        data_key : Optional[str]
+            The key of the data used by `render`. Default is the key of the
+            main YAML file.
 
-        """
-        rendered_resume = context.render_resume(self.data)
-        self.write(context, rendered_resume, base=base)
+        Returns
+        -------
+        str
+            The name of the rendered file.
+
+        Notes
+        -----
+        Rendering is skipped if the résumé was already rendered in a previous
+        run from the same data and templates.
 
-    def generate_resumes(self, contexts):
+        """
+        if data_key is None:
+            data_key = self.data_key(self.data)
+        name, key = self.resume_key(context, base, data_key, business)
+        if self.manifest.is_current(name, key):
+            self.stats["up_to_date"] += 1
+            return self.manifest.entries[name]["outputs"][0]
+
+        self.stats["rendered"] += 1
+        if render is None:
+            rendered_resume = context.stream_resume(
+                types.MappingProxyType(self.data))
+        else:
+            rendered_resume = render(business)
+        output_file = self.write(context, rendered_resume,
+                                 context.username(self.data), base=base)
+        self.manifest.record(name, key, [output_file])
+        if self.compiler is not None and output_file.endswith(".tex"):
+            self.queue_compile(self.compiler, output_file)
+        return output_file
+
+    def generate_resumes(self, contexts, jobs=1):
         """
         Process the necessary résumés.
 
@@ -199,82 +753,336 @@ class ResumeGenerator(object):
         ----------
         contexts : list[ContextRenderer]
             The renderers for the formats to use.
+        jobs : Optional[int]
+            The number of contexts to render at once. Default is 1.
+
+        Notes
+        -----
+        With more than one job, the contexts which are not up to date are
+        rendered in worker processes, each from its own copy of the data. The
+        rendered résumés are written, and compiled if pipelining, as they come
+        in. Otherwise, each context renders from a read-only view of the data.
 
         """
-        for context in tqdm.tqdm(contexts, leave=True, desc="Rendering résumé",
-                                 unit="formats"):
-            self.process_resume(context)
+        data_key = self.data_key(self.data)
+        outdated = [context for context in contexts
+                    if not self.manifest.is_current(*self.resume_key(
+                        context, config.BASE_FILE_NAME, data_key))]
+
+        executor = None
+        renders = {}
+        if jobs > 1 and len(outdated) > 1:
+            import concurrent.futures
+            executor = concurrent.futures.ProcessPoolExecutor(
+                min(jobs, len(outdated)))
+            for context in outdated:
+                future = executor.submit(render_context, context.context_name,
+                                         self.data, context.cache_dir)
+                renders[context.context_name] = \
+                    lambda business, future=future: future.result()
+
+        try:
+            for context in progress(contexts, leave=True,
+                                    desc="Rendering résumé", unit="formats"):
+                self.process_resume(context,
+                                    render=renders.get(context.context_name),
+                                    data_key=data_key)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
 
     def generate_cover_letters(self, context):
         """
-        Generate cover letters for all companies in the business YAML file.
+        Generate cover letters for all companies in the business file.
 
         Parameters
         ----------
         context : ContextRenderer
             The renderer to use.
 
+        Notes
+        -----
+        Businesses are read lazily and processed in chunks, after which the
+        manifest is saved if it was not saved in the last
+        `MANIFEST_SAVE_INTERVAL` seconds, and once more at the end. Letters to businesses which are no longer listed
+        are removed from the build directory. Each letter is rendered from its
+        own copy of the data, so the main data is not modified.
+
+        The sections of the résumé are the same for every business, so they are
+        rendered once, the first time a letter needs rendering, and reused for
+        every letter.
+
+        """
+        letters_data = dict(self.data,
+                            pwd=posixpath.abspath(".").replace("\\", "/"))
+        data_key = self.data_key(letters_data)
+        resume = {}
+        self.letter_stems = set()
+        letter_names = set()
+
+        def render_letter(business):
+            if not resume:
+                resume["data"] = context.prepare(letters_data)
+                resume["body"] = context.render_body(resume["data"])
+            business = dict(business, body=context.render_template(
+                config.LETTER_FILE_NAME, dict(letters_data, business=business)
+            ))
+            return context.stream_document(resume["data"], resume["body"],
+                                           business=business)
+
+        businesses = progress(iter_businesses(self.businesses_file,
+                                              self.businesses_cache_dir),
+                              desc="Generating cover letters",
+                              unit="letter", leave=True)
+        for chunk in chunked(businesses, config.BUSINESS_CHUNK_SIZE):
+            # Create cover letter directory
+            os.makedirs(posixpath.join(self.output_dir, config.LETTERS_DIR),
+                        exist_ok=True)
+            for base, business in chunk:
+                output_file = self.process_resume(context, base=base,
+                                                  business=business,
+                                                  render=render_letter,
+                                                  data_key=data_key)
+                self.letter_stems.add(
+                    posixpath.splitext(posixpath.basename(output_file))[0])
+                letter_names.add(posixpath.join(context.context_name, base))
+            self.manifest.checkpoint(config.MANIFEST_SAVE_INTERVAL)
+
+        # Remove letters to businesses which are no longer listed, along with
+        # their auxiliary files and what the manifest recorded about them
+        def is_stale(stem):
+            return not stem.startswith("0_") and stem not in self.letter_stems
+
+        for file in os.listdir(self.build_dir):
+            stem, ext = posixpath.splitext(file)
+            if (is_stale(stem)
+                    and ext in (context.filetype, context.output_filetype)):
+                os.remove(posixpath.join(self.build_dir, file))
+        aux_dir = posixpath.join(self.build_dir, config.AUX_DIR)
+        if os.path.isdir(aux_dir):
+            for stem in os.listdir(aux_dir):
+                if is_stale(stem):
+                    shutil.rmtree(posixpath.join(aux_dir, stem),
+                                  ignore_errors=True)
+
+        resume_name = posixpath.join(context.context_name,
+                                     config.BASE_FILE_NAME)
+        for name in list(self.manifest.entries):
+            directory, file = posixpath.split(name)
+            if ((directory == context.context_name and name != resume_name
+                 and name not in letter_names)
+                    or (directory == self.build_dir
+                        and file.endswith(context.filetype)
+                        and is_stale(posixpath.splitext(file)[0]))):
+                self.manifest.remove(name)
+        self.manifest.save()
+
+    def compile_key(self, tex_file):
         """
-        businesses = load_yaml(
-            posixpath.join(config.YAML_DIR,
-                           config.YAML_BUSINESSES + ".yaml"))
+        Summarize what a LaTeX file is compiled from.
 
-        if not businesses:
-            return
+        Parameters
+        ----------
+        tex_file : str
+            The LaTeX file.
 
-        # Create cover letter directory
-        os.makedirs(posixpath.join(config.OUTPUT_DIR, config.LETTERS_DIR),
-                    exist_ok=True)
+        Returns
+        -------
+        str
+            A key which is the same for files with the same contents, and
+            changes whenever the contents change.
 
-        self.data["pwd"] = posixpath.abspath(".").replace("\\", "/")
+        Notes
+        -----
+        The other files read while compiling are recorded as dependencies in
+        the manifest once the file is compiled.
 
-        for business in tqdm.tqdm(businesses, desc="Generating cover letters",
-                                  unit="letter", leave=True):
-            self.data["business"] = businesses[business]
-            self.data["business"]["body"] = context.render_template(
-                config.LETTER_FILE_NAME, self.data
-            )
-            self.process_resume(context, base=business)
+        """
+        return self.manifest.digest(self.data["engine"], file_digest(tex_file))
 
-    def compile_latex(self):
+    def record_compile(self, tex_file, key, dependencies):
         """
-        Compile changed LaTeX files into PDF.
+        Record that a LaTeX file was compiled.
+
+        Parameters
+        ----------
+        tex_file : str
+            The LaTeX file.
+        key : str
+            The key of the file.
+        dependencies : list[str]|None
+            The files read while compiling it, or None if they were not
+            recorded, in which case the dependencies declared in the file are
+            used.
 
         """
-        changed_files = [
-            file for file in files_of_type(".tex", config.BUILD_DIR)
-            if ((file in self.starting_hashes
-                and md5(file) != self.starting_hashes[file])
-                or not os.path.exists(file.replace(".tex", ".pdf")))
-        ]
-        if not changed_files:
+        if dependencies is None:
+            dependencies = latex_dependencies(tex_file)
+        self.manifest.record(
+            tex_file, key, [posixpath.splitext(tex_file)[0] + ".pdf"],
+            dependencies=[dependency for dependency in dependencies
+                          if dependency != tex_file]
+        )
+
+    def queue_compile(self, compiler, tex_file, key=None):
+        """
+        Start compiling a LaTeX file, unless its PDF is up to date.
+
+        A file with the same contents as another one is not compiled: the PDF
+        of the other file is linked or copied for it instead, either now if
+        that PDF is up to date, or once it is compiled.
+
+        Parameters
+        ----------
+        compiler : LatexCompiler
+            The compiler to use.
+        tex_file : str
+            The LaTeX file to compile.
+        key : Optional[str]
+            The key of the file, if already known.
+
+        """
+        if tex_file in self._compile_keys:
+            return
+        if key is None:
+            key = self.compile_key(tex_file)
+        pdf_file = posixpath.splitext(tex_file)[0] + ".pdf"
+        if self.manifest.is_current(tex_file, key):
+            self._built.setdefault(key, tex_file)
             return
 
-        os.chdir(config.BUILD_DIR)
-        for file in tqdm.tqdm(changed_files, desc="Generating PDFs",
-                              leave=True, unit="pdf"):
-            subprocess.call("{} {}".format(self.data["engine"],
-                                           os.path.basename(file)).split())
-        os.chdir("..")
+        self._compile_keys[tex_file] = key
+        if key in self._compile_groups:
+            self.stats["duplicates"] += 1
+            self._compile_groups[key].append(tex_file)
+        elif key in self._built:
+            self.stats["duplicates"] += 1
+            built = self._built[key]
+            publish_file(posixpath.splitext(built)[0] + ".pdf", pdf_file)
+            self.record_compile(tex_file, key, list(
+                self.manifest.entries[built].get("dependencies", {})))
+        else:
+            self._compile_groups[key] = [tex_file]
+            compiler.submit(tex_file)
 
-    @staticmethod
-    def copy_to_output_dir(output_types):
+    def compile_latex(self, jobs=1):
         """
-        Copy compiled résumés from the build directory to the output directory.
+        Compile changed LaTeX files into PDF.
+
+        Files already queued while rendering in pipelined mode are not queued
+        again.
+
+        Parameters
+        ----------
+        jobs : Optional[int]
+            The number of files to compile at once. Default is 1.
+
+        Returns
+        -------
+        list[CompileResult]
+            The result of compiling each changed file.
+
+        Notes
+        -----
+        When a file fails to compile, the PDFs of every file with the same
+        contents are removed, since they may be left over from other contents,
+        or be linked to the PDF of another file.
+
+        """
+        self.failed_pdfs = set()
+        compiler = self.compiler
+        if compiler is None:
+            compiler = LatexCompiler(
+                self.data["engine"], jobs=jobs,
+                precompile_preamble=self.precompile_preamble,
+                source_date_epoch=self.source_date_epoch
+            )
+        # Files with up-to-date PDFs go first, so that their duplicates can
+        # reuse those PDFs
+        keys = {file: self.compile_key(file)
+                for file in files_of_type(".tex", self.build_dir)
+                if file not in self._compile_keys}
+        for file in sorted(keys, key=lambda file: (
+                not self.manifest.is_current(file, keys[file]), file)):
+            self.queue_compile(compiler, file, key=keys[file])
+
+        results = compiler.wait()
+        for result in results:
+            key = self._compile_keys[result.tex_file]
+            if result.returncode == 0:
+                self.stats["compiled"] += 1
+                self.stats["passes"] += result.passes
+                pdf_file = posixpath.splitext(result.tex_file)[0] + ".pdf"
+                for tex_file in self._compile_groups[key]:
+                    if tex_file != result.tex_file:
+                        publish_file(pdf_file,
+                                     posixpath.splitext(tex_file)[0] + ".pdf")
+                    self.record_compile(tex_file, key, result.dependencies)
+            else:
+                self.stats["failed"] += 1
+                for tex_file in self._compile_groups[key]:
+                    pdf_file = posixpath.splitext(tex_file)[0] + ".pdf"
+                    self.failed_pdfs.add(pdf_file)
+                    self.manifest.remove(tex_file)
+                    if os.path.exists(pdf_file):
+                        os.remove(pdf_file)
+                print("Could not compile {} (exit status {}); see {}"
+                      .format(", ".join(self._compile_groups[key]),
+                              result.returncode, result.log_file),
+                      file=sys.stderr)
+        self._compile_keys = {}
+        self._compile_groups = {}
+        self._built = {}
+        return results
+
+    def copy_to_output_dir(self, output_types):
+        """
+        Publish compiled résumés from the build directory to the output
+        directory.
+
+        Only files which changed since they were last published are copied,
+        and PDFs which failed to compile are not published. If cover letters were generated, letters for businesses which are no
+        longer listed are not published, and are removed from the output
+        directory.
+
+        Parameters
+        ----------
+        output_types : Iterable[str]
+            The extensions of the files to publish.
 
         """
+        letters_dir = posixpath.join(self.output_dir, config.LETTERS_DIR)
+        published = set()
         for ext in output_types:
-            for file in files_of_type(ext, config.BUILD_DIR):
-                if os.path.basename(file).startswith("0_"):
-                    shutil.copyfile(file,
-                                    posixpath.join(config.OUTPUT_DIR,
-                                                   os.path.basename(file)[2:]))
+            for file in files_of_type(ext, self.build_dir):
+                if file in self.failed_pdfs:
+                    continue
+                basename = os.path.basename(file)
+                if basename.startswith("0_"):
+                    destination = posixpath.join(self.output_dir,
+                                                 basename[2:])
                 else:
-                    shutil.copy(file, posixpath.join(config.OUTPUT_DIR,
-                                                     config.LETTERS_DIR))
-
-    @staticmethod
-    def write(context, output_data, base=config.BASE_FILE_NAME):
+                    if (self.letter_stems is not None
+                            and posixpath.splitext(basename)[0]
+                            not in self.letter_stems):
+                        continue
+                    os.makedirs(letters_dir, exist_ok=True)
+                    destination = posixpath.join(letters_dir, basename)
+                    published.add(basename)
+
+                with tracing.span("copy", file=file):
+                    if publish_file(file, destination):
+                        self.stats["published"] += 1
+
+        if self.letter_stems is not None and os.path.isdir(letters_dir):
+            for basename in os.listdir(letters_dir):
+                if (posixpath.splitext(basename)[1] in output_types
+                        and basename not in published):
+                    os.remove(posixpath.join(letters_dir, basename))
+                    self.stats["pruned"] += 1
+
+    def write(self, context, output_data, username,
+              base=config.BASE_FILE_NAME):
         """
         Save the résumé to file.
 
@@ -282,31 +1090,58 @@ class ResumeGenerator(object):
         ----------
         context : ContextRenderer
             The context to use while writing.
-        output_data : str
-            The data to be written.
+        output_data : str|Iterable[str]
+            The data to be written, at once or piece by piece.
+        username : str
+            The user's name, as shown in the file name.
         base : str
             The root filename for the résumé. The user's name would be prepended
             to this.
 
+        Returns
+        -------
+        str
+            The name of the file written.
+
         Notes
         -----
         If the base is the default name, then a "0_" is also prepended to
         visually separate the base résumé from potential business résumés.
 
+        The data is written to a temporary file, which then atomically replaces
+        the output file. If the output file already has the same contents, it is
+        left untouched, so that its modification time stays the same.
+
         """
         if base == config.BASE_FILE_NAME:
             prefix = "0_"
         else:
             prefix = ""
-        output_file = posixpath.join(config.BUILD_DIR,
+        output_file = posixpath.join(self.build_dir,
                                      "{prefix}{name}_{base}{ext}".format(
                                          prefix=prefix,
-                                         name=context.username,
+                                         name=username,
                                          base=base,
                                          ext=context.filetype)
                                      )
-        with open(output_file, "w") as fout:
-            fout.write(output_data)
+        temp_file = output_file + ".tmp"
+        with tracing.span("write", file=output_file):
+            try:
+                with open(temp_file, "w") as fout:
+                    if isinstance(output_data, str):
+                        fout.write(output_data)
+                    else:
+                        fout.writelines(output_data)
+                if (posixpath.exists(output_file)
+                        and filecmp.cmp(temp_file, output_file, shallow=False)):
+                    os.remove(temp_file)
+                else:
+                    os.replace(temp_file, output_file)
+            except BaseException:
+                if posixpath.exists(temp_file):
+                    os.remove(temp_file)
+                raise
+        return output_file
 
 
 class ContextRenderer(object):
@@ -325,50 +1160,191 @@ class ContextRenderer(object):
     replacements : dict[str, str]
         A list of replacements to perform in order to change LaTeX formatting to
         the corresponding code for the context.
+    cache_dir : Optional[str]
+        A directory in which to keep compiled templates and the index of
+        templates between runs. Default is not to keep them.
 
     Attributes
     ----------
     base_template : str
         The root filename for the résumé. The user's name would be prepended to
         this.
+    cache_dir : str|None
+        The directory in which compiled templates and the index are kept.
     context_name : str
         The name of the context.
     filetype : str
         The file extension to use.
-    jinja_env : dict
+    fingerprint : str
+        A hash of the templates, replacements, and Jinja options of the context.
+    jinja_env : jinja2.Environment
         The Jinja environment.
+    jinja_options : dict
+        The options with which to create the Jinja environment.
     known_section_types : list
         A list of known sections for the context.
     replacements : dict[str, str]
         A list of replacements to perform in order to change LaTeX formatting to
         the corresponding code for the context.
+    replacer : Replacer
+        Performs the replacements.
+    section_digests : dict[str, str]
+        A hash of the template of each section type, and of the templates it
+        may extend or include.
+    templates_dir : str
+        The directory containing the templates for the context.
 
     """
     def __init__(self, *, context_name, filetype, output_filetype=None,
-                 jinja_options, replacements):
+                 jinja_options, replacements, cache_dir=None):
         self.base_template = config.BASE_FILE_NAME
         self.context_name = context_name
 
         self.filetype = filetype
         self.output_filetype = output_filetype
         self.replacements = replacements
-        self.username = None
+        self.replacer = Replacer(replacements)
 
-        context_templates_dir = posixpath.join(config.TEMPLATES_DIR,
-                                               context_name)
+        self.cache_dir = cache_dir
+        self.templates_dir = posixpath.join(config.TEMPLATES_DIR, context_name)
 
-        jinja_options = jinja_options.copy()
-        jinja_options["loader"] = jinja2.FileSystemLoader(
-            searchpath=context_templates_dir
-        )
-        jinja_options["undefined"] = jinja2.StrictUndefined
-        self.jinja_env = jinja2.Environment(**jinja_options)
+        self.jinja_options = jinja_options
+        self._jinja_env = None
+        self._sections = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self.refresh()
+
+    @property
+    def jinja_env(self):
+        """
+        The Jinja environment, created the first time a template is rendered.
+
+        Runs in which every output is up to date never import Jinja.
+
+        """
+        if self._jinja_env is None:
+            import jinja2
+
+            jinja_options = self.jinja_options.copy()
+            jinja_options["loader"] = jinja2.FileSystemLoader(
+                searchpath=self.templates_dir
+            )
+            jinja_options["undefined"] = jinja2.StrictUndefined
+            if self.cache_dir is not None:
+                bytecode_dir = posixpath.join(self.cache_dir,
+                                              config.BYTECODE_DIR)
+                os.makedirs(bytecode_dir, exist_ok=True)
+                jinja_options["bytecode_cache"] = \
+                    jinja2.FileSystemBytecodeCache(directory=bytecode_dir)
+            self._jinja_env = jinja2.Environment(**jinja_options)
+        return self._jinja_env
+
+    def refresh(self):
+        """
+        Update the known section types and the fingerprint of the templates.
+
+        Changed templates are reloaded by Jinja when they are next used.
+
+        """
+        index = self._index_templates(self.templates_dir, self.cache_dir)
+        self.known_section_types = index["known_section_types"]
+        self.fingerprint = index["fingerprint"]
+        self.section_digests = index["section_digests"]
+
+    def _index_templates(self, templates_dir, cache_dir=None):
+        """
+        Find the known section types and hash the templates of the context.
+
+        If a cache directory is given, the index is stored there, and reused as
+        long as no template was added, removed, or modified since, and the
+        replacements and Jinja options are the same.
+
+        Parameters
+        ----------
+        templates_dir : str
+            The directory containing the templates for the context.
+        cache_dir : Optional[str]
+            The directory in which to keep the index. Default is not to keep it.
+
+        Returns
+        -------
+        dict
+            The index.
+
+            **Dictionary format :** {"known_section_types": list[str],
+                                     "fingerprint": str,
+                                     "section_digests": dict[str, str],
+                                     "stamp": list,
+                                     "settings": str}
 
-        self.known_section_types = [os.path.splitext(os.path.basename(s))[0]
-                                    for s in files_of_type(
-                                        self.filetype,
-                                        posixpath.join(context_templates_dir,
-                                                       config.SECTIONS_DIR))]
+        Notes
+        -----
+        Section templates extend or include the templates at the top of the
+        templates directory, so those are part of the digest of every section,
+        as are the replacements and Jinja options that all templates share.
+
+        """
+        template_files = []
+        for root, dirs, files in os.walk(templates_dir):
+            dirs.sort()
+            template_files.extend(posixpath.join(root, filename)
+                                  for filename in sorted(files))
+        stamp = [[path, os.stat(path).st_mtime_ns, os.stat(path).st_size]
+                 for path in template_files]
+        settings = repr([sorted(self.replacements.items()),
+                         sorted(self.jinja_options.items())])
+
+        if cache_dir is not None:
+            index_file = posixpath.join(cache_dir,
+                                        "{}.json".format(self.context_name))
+            try:
+                with open(index_file) as fin:
+                    index = json.load(fin)
+                if (index["stamp"] == stamp
+                        and index.get("settings") == settings):
+                    return index
+            except (OSError, ValueError, KeyError):
+                pass
+
+        digests = {path: file_digest(path) for path in template_files}
+        sha = hashlib.sha256(settings.encode())
+        shared = hashlib.sha256(settings.encode())
+        for path in template_files:
+            sha.update(path.encode())
+            sha.update(digests[path].encode())
+            if posixpath.dirname(path) == templates_dir:
+                shared.update(path.encode())
+                shared.update(digests[path].encode())
+
+        sections_dir = posixpath.join(templates_dir, config.SECTIONS_DIR)
+        known_section_types = [
+            os.path.splitext(os.path.basename(s))[0]
+            for s in files_of_type(self.filetype, sections_dir)
+        ]
+        section_digests = {}
+        for section_type in known_section_types:
+            path = posixpath.join(sections_dir, section_type + self.filetype)
+            section_digests[section_type] = hashlib.sha256(
+                (shared.hexdigest() + digests.get(path, "")).encode()
+            ).hexdigest()
+
+        index = {
+            "known_section_types": known_section_types,
+            "fingerprint": sha.hexdigest(),
+            "section_digests": section_digests,
+            "stamp": stamp,
+            "settings": settings,
+        }
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_file = "{}.{}.{}.tmp".format(index_file, os.getpid(),
+                                              threading.get_ident())
+            with open(temp_file, "w") as fout:
+                json.dump(index, fout)
+            os.replace(temp_file, index_file)
+        return index
 
     def _make_replacements(self, data):
         """
@@ -386,19 +1362,14 @@ class ContextRenderer(object):
             A copy of the data containing the replaced strings.
 
         """
-        data = copy.copy(data)
-
         if isinstance(data, str):
-            for o, r in self.replacements.items():
-                data = re.sub(o, r, data)
+            return self.replacer.replace(data)
 
-        elif isinstance(data, dict):
-            for k, v in data.items():
-                data[k] = self._make_replacements(v)
+        elif isinstance(data, (dict, types.MappingProxyType)):
+            return {k: self._make_replacements(v) for k, v in data.items()}
 
         elif isinstance(data, list):
-            for idx, item in enumerate(data):
-                data[idx] = self._make_replacements(item)
+            return [self._make_replacements(item) for item in data]
 
         return data
 
@@ -443,8 +1414,32 @@ class ContextRenderer(object):
             The rendered template.
 
         """
-        return self.jinja_env.get_template(template_name + self.filetype)\
-                             .render(**data)
+        with tracing.span("render_template", context=self.context_name,
+                          template=template_name):
+            return self.jinja_env.get_template(template_name + self.filetype)\
+                                 .render(**data)
+
+    def stream_template(self, template_name, data):
+        """
+        Render a template piece by piece.
+
+        Parameters
+        ----------
+        template_name : str
+            The name of the template.
+        data : dict
+            The data to be rendered.
+
+        Yields
+        ------
+        str
+            The successive pieces of the rendered template.
+
+        """
+        with tracing.span("stream_template", context=self.context_name,
+                          template=template_name):
+            yield from self.jinja_env.get_template(
+                template_name + self.filetype).generate(**data)
 
     def _render_section(self, section, data):
         """
@@ -468,6 +1463,12 @@ class ContextRenderer(object):
         str
             The rendered section.
 
+        Notes
+        -----
+        Sections are only rendered again if their data or templates changed
+        since they were last rendered by this renderer, or, with a cache
+        directory, by any run.
+
         """
         section_tag, show_title, section_title, section_type = section
         section_data = {"name": section_title} if show_title else {}
@@ -477,6 +1478,15 @@ class ContextRenderer(object):
         section_type = self._find_section_type(section_tag, section_type)
         section_data["type"] = section_type
 
+        key = hashlib.sha256("\0".join([
+            self.context_name, section_type,
+            self.section_digests.get(section_type, ""),
+            json.dumps(section_data, sort_keys=True, default=str),
+        ]).encode()).hexdigest()
+        rendered_section = self._cached_section(key)
+        if rendered_section is not None:
+            return rendered_section
+
         if section_type == "double_items":
             section_data["items"] = self._make_double_list(
                 section_data["items"])
@@ -486,8 +1496,92 @@ class ContextRenderer(object):
 
         rendered_section = self.render_template(section_template_name,
                                                  section_data)
+        self._cache_section(key, rendered_section)
+        return rendered_section
+
+    def _section_file(self, key):
+        """
+        Find where a rendered section is kept on disk.
+
+        Parameters
+        ----------
+        key : str
+            The key of the section.
+
+        Returns
+        -------
+        str|None
+            The file name, or None if sections are not kept on disk.
+
+        """
+        if self.cache_dir is None:
+            return None
+        return posixpath.join(self.cache_dir, config.SECTION_CACHE_DIR,
+                              self.context_name, key + self.filetype)
+
+    def _cached_section(self, key):
+        """
+        Look up a section rendered earlier, in memory and then on disk.
+
+        Parameters
+        ----------
+        key : str
+            The key of the section.
+
+        Returns
+        -------
+        str|None
+            The rendered section, or None if it was not rendered before.
+
+        """
+        with self._lock:
+            if key in self._sections:
+                self._sections.move_to_end(key)
+                return self._sections[key]
+
+        section_file = self._section_file(key)
+        if section_file is None:
+            return None
+        try:
+            with open(section_file) as fin:
+                rendered_section = fin.read()
+        except OSError:
+            return None
+        self._cache_section(key, rendered_section, save=False)
         return rendered_section
 
+    def _cache_section(self, key, rendered_section, save=True):
+        """
+        Keep a rendered section for later.
+
+        At most `config.SECTION_CACHE_SIZE` sections are kept in memory, the
+        least recently used being dropped first.
+
+        Parameters
+        ----------
+        key : str
+            The key of the section.
+        rendered_section : str
+            The rendered section.
+        save : Optional[bool]
+            Whether to also keep the section on disk, if there is a cache
+            directory. Default is True.
+
+        """
+        with self._lock:
+            self._sections[key] = rendered_section
+            if len(self._sections) > config.SECTION_CACHE_SIZE:
+                self._sections.popitem(last=False)
+
+        section_file = self._section_file(key)
+        if save and section_file is not None:
+            os.makedirs(posixpath.dirname(section_file), exist_ok=True)
+            temp_file = "{}.{}.{}.tmp".format(section_file, os.getpid(),
+                                              threading.get_ident())
+            with open(temp_file, "w") as fout:
+                fout.write(rendered_section)
+            os.replace(temp_file, section_file)
+
     def _find_section_type(self, section_tag, section_type):
         """
         Determine a section's type.
@@ -526,34 +1620,168 @@ class ContextRenderer(object):
 
         return section_type
 
-    def render_resume(self, data):
+    def prepare(self, data):
         """
-        Render the entire résumé.
+        Prepare the data for rendering.
+
+        Parameters
+        ----------
+        data : Mapping
+            The data to render. It is not modified.
+
+        Returns
+        -------
+        dict
+            A copy of the data, with the replacements performed, and the date of
+            the last update if it was not there already.
+
+        """
+        if "updated" not in data:
+            data = dict(data,
+                        updated=updated_date(data["last_updated_method"]))
+
+        with tracing.span("_make_replacements", context=self.context_name):
+            return self._make_replacements(data)
+
+    def username(self, data):
+        """
+        Get the user's abbreviated name, as written in this context.
+
+        Parameters
+        ----------
+        data : Mapping
+            The résumé data.
+
+        Returns
+        -------
+        str
+            The abbreviated name, with the replacements performed.
+
+        """
+        return self._make_replacements(data["name"]["abbrev"])
+
+    def render_body(self, data, show_progress=True):
+        """
+        Render all the sections of the résumé.
 
         Parameters
         ----------
         data : dict
-            The data to render.
+            The prepared data to render.
+        show_progress : Optional[bool]
+            Whether to show a progress bar, if progress bars are enabled.
+            Default is True.
 
         Returns
         -------
+        list[str]
+            The rendered sections, in order.
+
+        """
+        body = []
+        sections = data["order"]
+        if show_progress:
+            sections = progress(sections, desc=self.context_name,
+                                unit="sections")
+        for section in sections:
+            with tracing.span("_render_section", context=self.context_name,
+                              section=section[0]):
+                body.append(self._render_section(section, data).rstrip()
+                            + "\n\n\n")
+        return body
+
+    def stream_document(self, data, body, business=None):
+        """
+        Render the base template around already rendered sections, piece by
+        piece.
+
+        The base template is rendered with a marker in place of the body, which
+        is then replaced by the sections as they are, so that the body is never
+        copied into one large string.
+
+        Parameters
+        ----------
+        data : dict
+            The prepared data to render.
+        body : list[str]
+            The rendered sections.
+        business : Optional[dict]
+            The business to address a cover letter to. The replacements are
+            performed on it. Default is to not include a cover letter.
+
+        Yields
+        ------
         str
-            The rendered résumé.
+            The successive pieces of the rendered document, without trailing
+            whitespace, and ending with a newline.
+
+        Raises
+        ------
+        ValueError
+            If the base template does not show the body unchanged.
+
+        """
+        data = dict(data, body=BODY_MARKER)
+        if business is not None:
+            data["business"] = self._make_replacements(business)
+
+        found = False
+        whitespace = []
+        for chunk in self.stream_template(self.base_template, data):
+            for i, part in enumerate(chunk.split(BODY_MARKER)):
+                pieces = [part]
+                if i:
+                    found = True
+                    pieces = body + pieces
+                for piece in pieces:
+                    # Hold back whitespace until something follows it, so that
+                    # trailing whitespace can be left out at the end
+                    stripped = piece.rstrip()
+                    if stripped:
+                        yield from whitespace
+                        yield stripped
+                        whitespace = []
+                    whitespace.append(piece[len(stripped):])
+        if not found:
+            raise ValueError("the base template of {} does not show the body"
+                             .format(self.context_name))
+        yield "\n"
+
+    def stream_resume(self, data, show_progress=True):
+        """
+        Render the entire résumé, piece by piece.
+
+        Parameters
+        ----------
+        data : Mapping
+            The data to render. It is not modified.
+        show_progress : Optional[bool]
+            Whether to show a progress bar, if progress bars are enabled.
+            Default is True.
+
+        Returns
+        -------
+        Iterator[str]
+            The successive pieces of the rendered résumé.
 
         """
-        if data["last_updated_method"] == "git":
-            last_updated = time.localtime(git.Repo().head.commit.committed_date)
-        elif data["last_updated_method"] == "time":
-            last_updated = time.localtime(time.time())
-        data["updated"] = time.strftime(config.DATE_FMT, last_updated)
+        data = self.prepare(data)
+        return self.stream_document(data, self.render_body(data,
+                                                           show_progress))
 
-        data = self._make_replacements(data)
-        self.username = data["name"]["abbrev"]
+    def render_resume(self, data):
+        """
+        Render the entire résumé.
 
-        body = ""
-        for section in tqdm.tqdm(data["order"], desc=self.context_name,
-                                 unit="sections"):
-            body += self._render_section(section, data).rstrip() + "\n\n\n"
-        data["body"] = body
+        Parameters
+        ----------
+        data : Mapping
+            The data to render. It is not modified.
 
-        return self.render_template(self.base_template, data).rstrip() + "\n"
+        Returns
+        -------
+        str
+            The rendered résumé.
+
+        """
+        return "".join(self.stream_resume(data))
@@ -0,0 +1,584 @@
+"""
+Serves résumés and cover letters over HTTP.
+
+The renderers of every context are created, and their templates compiled, when
+the server starts, and are shared by every request. Finished outputs, PDFs
+included, are kept in memory in a cache bounded by size, and identical requests
+arriving while one is being rendered wait for it rather than rendering again.
+
+Routes
+------
+GET /<format>
+    The résumé from the input files. The format is a context, or "pdf".
+GET /<format>?business=<company>
+    The cover letter to a company of the business file, in LaTeX or as a PDF.
+POST /<format>
+    The résumé or cover letter for the JSON body, with the résumé data under
+    "data" and the business under "business". Both are optional, and default to
+    the input files and to the résumé. Only JSON is accepted, so that other web
+    pages cannot post to the server, and the data may only name one of
+    `ENGINES` as its LaTeX engine.
+GET /metrics
+    The use of the cache and the latency of each route, as JSON.
+
+"""
+import collections
+import concurrent.futures
+import hashlib
+import http.server
+import json
+import os
+import posixpath
+import threading
+import time
+import urllib.parse
+
+import config
+from businesses import iter_businesses
+from contexts import CONTEXTS
+from loader import load_yaml
+from resume_generator import (add_publications, format_date, get_renderer,
+                              render, updated_timestamp)
+
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".md": "text/markdown; charset=utf-8",
+    ".pdf": "application/pdf",
+    ".tex": "application/x-tex; charset=utf-8",
+    ".txt": "text/plain; charset=utf-8",
+}
+ENGINES = ("pdflatex", "xelatex")
+LATENCY_SAMPLES = 1024
+
+
+class OutputCache(object):
+    """
+    Keep the most recently used outputs in memory, up to a total size.
+
+    Computing a value which is already being computed waits for it instead.
+
+    Parameters
+    ----------
+    max_size : int
+        The maximum total size of the outputs, in bytes.
+
+    Attributes
+    ----------
+    max_size : int
+        The maximum total size of the outputs, in bytes.
+    size : int
+        The total size of the outputs, in bytes.
+    stats : collections.Counter
+        The number of "hits", "misses", "coalesced" requests, and "evictions".
+
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.stats = collections.Counter()
+        self._entries = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, compute):
+        """
+        Get an output, computing it if it is not cached.
+
+        Parameters
+        ----------
+        key : str
+            The key of the output.
+        compute : callable
+            A function returning a dictionary of outputs by key, including the
+            one requested. Every output is cached.
+
+        Returns
+        -------
+        bytes
+            The output.
+
+        Raises
+        ------
+        Exception
+            Whatever `compute` raised, in every request waiting for it.
+
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key]
+            owner = False
+            future = self._pending.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+            else:
+                self.stats["misses"] += 1
+                future = self._pending[key] = concurrent.futures.Future()
+                owner = True
+        if not owner:
+            return future.result()
+
+        try:
+            outputs = compute()
+            with self._lock:
+                for output_key, value in outputs.items():
+                    self._put(output_key, value)
+            future.set_result(outputs[key])
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+        return outputs[key]
+
+    def _put(self, key, value):
+        """
+        Cache an output, evicting the least recently used ones to make room.
+
+        Outputs larger than the whole cache are not kept. The lock must be held.
+
+        """
+        if len(value) > self.max_size:
+            return
+        if key in self._entries:
+            self.size -= len(self._entries.pop(key))
+        self._entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.stats["evictions"] += 1
+
+
+class Metrics(object):
+    """
+    Count the requests to each route, and time the most recent ones.
+
+    Attributes
+    ----------
+    latencies : dict[str, collections.deque]
+        The latest latencies of each route, in seconds.
+    requests : collections.Counter
+        The number of requests to each route.
+    errors : collections.Counter
+        The number of failed requests to each route.
+
+    """
+    def __init__(self):
+        self.latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=LATENCY_SAMPLES))
+        self.requests = collections.Counter()
+        self.errors = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, route, latency, failed=False):
+        """
+        Record a request.
+
+        Parameters
+        ----------
+        route : str
+            The route requested.
+        latency : float
+            How long the request took, in seconds.
+        failed : Optional[bool]
+            Whether the request failed. Default is False.
+
+        """
+        with self._lock:
+            self.requests[route] += 1
+            if failed:
+                self.errors[route] += 1
+            self.latencies[route].append(latency)
+
+    def report(self):
+        """
+        Summarize the requests to each route.
+
+        Returns
+        -------
+        dict[str, dict]
+            The number of requests and errors, and the mean, median, 95th
+            percentile, and maximum latency in milliseconds, by route.
+
+        """
+        with self._lock:
+            latencies = {route: sorted(samples)
+                         for route, samples in self.latencies.items()}
+            report = {}
+            for route, samples in latencies.items():
+                report[route] = {
+                    "requests": self.requests[route],
+                    "errors": self.errors[route],
+                    "mean_ms": 1000 * sum(samples) / len(samples),
+                    "p50_ms": 1000 * samples[len(samples) // 2],
+                    "p95_ms": 1000 * samples[int(len(samples) * 0.95)],
+                    "max_ms": 1000 * samples[-1],
+                }
+        return report
+
+
+class RenderServer(http.server.ThreadingHTTPServer):
+    """
+    Render résumés and cover letters on request, with warm renderers.
+
+    Parameters
+    ----------
+    address : tuple[str, int]
+        The host and port to listen on.
+    cache_size : Optional[int]
+        The maximum total size of the cached outputs, in bytes. Default is the
+        one in the config file.
+    businesses_file : Optional[str]
+        The file to find businesses in. Default is the business YAML file.
+    cache_dir : Optional[str]
+        The directory in which compiled templates and rendered sections are
+        kept between runs. Default is to only keep them in memory.
+
+    Attributes
+    ----------
+    businesses_cache_dir : str|None
+        The directory in which the business file is cached, if it is the
+        default one.
+    businesses_file : str
+        The file to find businesses in.
+    cache : OutputCache
+        The finished outputs.
+    cache_dir : str|None
+        The directory in which compiled templates and sections are kept.
+    metrics : Metrics
+        The requests served so far.
+
+    """
+    daemon_threads = True
+
+    def __init__(self, address, cache_size=config.SERVER_CACHE_SIZE,
+                 businesses_file=None, cache_dir=None):
+        super().__init__(address, RenderRequestHandler)
+        self.cache = OutputCache(cache_size)
+        self.cache_dir = cache_dir
+        self.metrics = Metrics()
+        self.businesses_cache_dir = None
+        if businesses_file is None:
+            businesses_file = posixpath.join(
+                config.YAML_DIR, config.YAML_BUSINESSES + ".yaml")
+            self.businesses_cache_dir = posixpath.join(
+                config.BUILD_DIR, config.CACHE_DIR, config.YAML_CACHE_DIR)
+        self.businesses_file = businesses_file
+        self._businesses = None
+        self._businesses_lock = threading.Lock()
+        self._refreshed = {}
+        self._refresh_lock = threading.Lock()
+
+        for context_name in CONTEXTS:
+            jinja_env = get_renderer(context_name, cache_dir).jinja_env
+            for template in jinja_env.list_templates():
+                jinja_env.get_template(template)
+
+    @staticmethod
+    def load_inputs():
+        """
+        Load the résumé data from the input files.
+
+        Unchanged files are not parsed again.
+
+        Returns
+        -------
+        dict
+            The résumé data, with its publications.
+
+        """
+        yaml_cache_dir = posixpath.join(config.BUILD_DIR, config.CACHE_DIR,
+                                        config.YAML_CACHE_DIR)
+        data = load_yaml(posixpath.join(config.YAML_DIR,
+                                        config.YAML_MAIN + ".yaml"),
+                         cache_dir=yaml_cache_dir)
+        return add_publications(data, cache_dir=yaml_cache_dir)
+
+    def find_business(self, company):
+        """
+        Find a business in the business file.
+
+        The businesses are kept in memory, and only read again when the file
+        changes.
+
+        Parameters
+        ----------
+        company : str
+            The name of the business, as used in the filenames of its letters.
+
+        Returns
+        -------
+        dict
+            The business.
+
+        Raises
+        ------
+        KeyError
+            If the business is not listed.
+
+        """
+        stat = os.stat(self.businesses_file)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._businesses_lock:
+            if self._businesses is None or self._businesses[0] != stamp:
+                self._businesses = (stamp, dict(iter_businesses(
+                    self.businesses_file, self.businesses_cache_dir
+                )))
+            return self._businesses[1][company]
+
+    def fingerprint(self, context_name):
+        """
+        Get the fingerprint of the templates of a context.
+
+        Templates are checked for changes at most once every
+        `SERVER_REFRESH_INTERVAL` seconds, rather than on every request.
+
+        Parameters
+        ----------
+        context_name : str
+            The name of the context.
+
+        Returns
+        -------
+        str
+            The fingerprint.
+
+        """
+        context = get_renderer(context_name, self.cache_dir)
+        with self._refresh_lock:
+            now = time.monotonic()
+            if (now - self._refreshed.get(context_name, -float("inf"))
+                    >= config.SERVER_REFRESH_INTERVAL):
+                context.refresh()
+                self._refreshed[context_name] = now
+            return context.fingerprint
+
+    def output_key(self, format_name, data, business=None):
+        """
+        Summarize what an output is rendered from.
+
+        Parameters
+        ----------
+        format_name : str
+            The name of the context, or "pdf".
+        data : dict
+            The résumé data, including the date of the last update.
+        business : Optional[dict]
+            The business to write to. Default is to render the résumé.
+
+        Returns
+        -------
+        str
+            A hash of the data, business, format, and templates.
+
+        """
+        fingerprint = self.fingerprint("latex" if format_name == "pdf"
+                                       else format_name)
+        sha = hashlib.sha256(json.dumps([data, business], sort_keys=True,
+                                        default=str).encode())
+        sha.update(format_name.encode())
+        sha.update(fingerprint.encode())
+        return sha.hexdigest()
+
+    def respond(self, format_name, data=None, business=None):
+        """
+        Render a résumé or cover letter, unless it is cached.
+
+        Parameters
+        ----------
+        format_name : str
+            The name of the context, or "pdf".
+        data : Optional[dict]
+            The résumé data. Default is to load the input files.
+        business : Optional[dict]
+            The business to write to. Default is to render the résumé.
+
+        Returns
+        -------
+        bytes
+            The output.
+
+        """
+        if data is None:
+            data = self.load_inputs()
+        source_date_epoch = None
+        if "updated" not in data:
+            source_date_epoch = updated_timestamp(data["last_updated_method"])
+            data = dict(data, updated=format_date(source_date_epoch))
+
+        key = self.output_key(format_name, data, business)
+        if format_name != "pdf":
+            return self.cache.get(key, lambda: {key: render(
+                data, [format_name], business=business,
+                cache_dir=self.cache_dir
+            )[format_name]})
+
+        latex_key = self.output_key("latex", data, business)
+
+        def compute():
+            outputs = render(data, pdf=True, business=business,
+                             cache_dir=self.cache_dir,
+                             source_date_epoch=source_date_epoch)
+            return {key: outputs["pdf"], latex_key: outputs["latex"]}
+        return self.cache.get(key, compute)
+
+    def report(self):
+        """
+        Summarize the use of the cache and the latency of each route.
+
+        Returns
+        -------
+        dict
+            The metrics.
+
+        """
+        stats = self.cache.stats
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        return {
+            "cache": {
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+                "coalesced": stats["coalesced"],
+                "evictions": stats["evictions"],
+                "hit_rate": (stats["hits"] / lookups) if lookups else None,
+                "entries": len(self.cache),
+                "size": self.cache.size,
+                "max_size": self.cache.max_size,
+            },
+            "routes": self.metrics.report(),
+        }
+
+
+class RenderRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Handle the requests to a `RenderServer`.
+
+    """
+    def do_GET(self):
+        self.handle_render(None)
+
+    def do_POST(self):
+        if self.headers.get_content_type() != "application/json":
+            self.send_error(415, explain="the body must be JSON")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("the body must be a JSON object")
+            data = body.get("data")
+            if data is not None and (not isinstance(data, dict)
+                                     or data.get("engine", ENGINES[0])
+                                     not in ENGINES):
+                raise ValueError("the data must be an object, and its engine "
+                                 "one of {}".format(", ".join(ENGINES)))
+        except ValueError as error:
+            self.send_error(400, explain=str(error))
+            return
+        self.handle_render(body)
+
+    def handle_render(self, body):
+        """
+        Send the requested output, and record how long it took.
+
+        Parameters
+        ----------
+        body : dict|None
+            The body of the request, if it was posted.
+
+        """
+        start = time.perf_counter()
+        url = urllib.parse.urlsplit(self.path)
+        route = url.path.strip("/")
+        failed = True
+        try:
+            if route == "metrics":
+                self.send_output(json.dumps(self.server.report(), indent=2)
+                                 .encode(), "application/json")
+                failed = False
+                return
+
+            if route != "pdf" and route not in CONTEXTS:
+                self.send_error(404, explain="unknown format {!r}"
+                                .format(route))
+                return
+
+            body = body or {}
+            business = body.get("business")
+            company = urllib.parse.parse_qs(url.query).get("business")
+            if company:
+                try:
+                    business = self.server.find_business(company[0])
+                except KeyError:
+                    self.send_error(404, explain="unknown business {!r}"
+                                    .format(company[0]))
+                    return
+            if business is not None and route not in ("latex", "pdf"):
+                self.send_error(400, explain="cover letters are only written "
+                                             "in LaTeX")
+                return
+
+            try:
+                output = self.server.respond(route, body.get("data"), business)
+            except Exception as error:
+                self.send_error(500, explain="{}: {}"
+                                .format(type(error).__name__, error))
+                return
+            filetype = (".pdf" if route == "pdf"
+                        else CONTEXTS[route]["filetype"])
+            self.send_output(output, CONTENT_TYPES[filetype])
+            failed = False
+        finally:
+            if route not in CONTEXTS and route not in ("metrics", "pdf"):
+                route = "<unknown>"
+            self.server.metrics.record(self.command + " /" + route,
+                                       time.perf_counter() - start,
+                                       failed=failed)
+
+    def send_output(self, output, content_type):
+        """
+        Send a successful response.
+
+        Parameters
+        ----------
+        output : bytes
+            The body of the response.
+        content_type : str
+            Its content type.
+
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(output)))
+        self.end_headers()
+        self.wfile.write(output)
+
+
+def serve(port=config.SERVER_PORT, host="127.0.0.1", **options):
+    """
+    Serve résumés and cover letters until interrupted.
+
+    Parameters
+    ----------
+    port : Optional[int]
+        The port to listen on. Default is the one in the config file.
+    host : Optional[str]
+        The host to listen on. Default is only to accept local connections.
+    options
+        The options of `RenderServer`.
+
+    """
+    with RenderServer((host, port), **options) as server:
+        print("Serving on http://{}:{}/. Press Ctrl+C to stop."
+              .format(host, server.server_address[1]))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,135 @@
+"""
+Times the stages of generating résumés.
+
+Code is instrumented with `span`, which reports how long each stage took to the
+registered hooks. Without any hooks, spans cost almost nothing.
+
+`ChromeTrace` is a hook collecting the spans in the Chrome trace event format,
+which can be opened in ``chrome://tracing`` or Perfetto. Each thread, such as
+each LaTeX worker, is shown in its own lane.
+
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+_hooks = []
+_epoch = time.perf_counter()
+
+
+def add_hook(hook):
+    """
+    Register a function to call whenever a span ends.
+
+    Parameters
+    ----------
+    hook : callable
+        A function taking the event as a dictionary, with the keys of a Chrome
+        trace complete event: "name", "cat", "ph", "ts", "dur", "pid", "tid",
+        and "args". Times are in microseconds.
+
+    Returns
+    -------
+    callable
+        The hook.
+
+    """
+    _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    """
+    Unregister a hook.
+
+    Parameters
+    ----------
+    hook : callable
+        The hook to remove.
+
+    """
+    _hooks.remove(hook)
+
+
+@contextlib.contextmanager
+def span(name, category="resume", **args):
+    """
+    Time a block of code.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+    category : Optional[str]
+        The category of the stage. Default is "resume".
+    args
+        Details about the stage, such as the file being processed.
+
+    """
+    if not _hooks:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - _epoch) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        for hook in list(_hooks):
+            hook(event)
+
+
+class ChromeTrace(object):
+    """
+    Collects spans in the Chrome trace event format.
+
+    Attributes
+    ----------
+    events : list[dict]
+        The events collected.
+
+    """
+    def __init__(self):
+        self.events = []
+        self._thread_names = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self.events.append(event)
+            self._thread_names.setdefault(
+                (event["pid"], event["tid"]), threading.current_thread().name
+            )
+
+    def save(self, filename):
+        """
+        Write the trace to a file.
+
+        Parameters
+        ----------
+        filename : str
+            The file to write to.
+
+        """
+        with self._lock:
+            metadata = [{"name": "thread_name", "ph": "M", "pid": pid,
+                         "tid": tid, "args": {"name": thread_name}}
+                        for (pid, tid), thread_name
+                        in self._thread_names.items()]
+            trace = {"traceEvents": metadata + self.events,
+                     "displayTimeUnit": "ms"}
+        with open(filename, "w") as fout:
+            json.dump(trace, fout)
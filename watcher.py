@@ -0,0 +1,284 @@
+"""
+Watches directories for changes to their files.
+
+On Linux, changes are reported by inotify. Elsewhere, or if inotify is not
+available, the directories are polled.
+
+"""
+import ctypes
+import ctypes.util
+import os
+import posixpath
+import select
+import struct
+import sys
+import time
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_EVENTS = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+             | IN_MOVED_TO | IN_CREATE | IN_DELETE)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def ignored(path):
+    """
+    Check whether a changed file should be ignored.
+
+    Editors' temporary and backup files are ignored.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    Returns
+    -------
+    bool
+        Whether to ignore the file.
+
+    """
+    filename = posixpath.basename(path)
+    return (filename.startswith((".", "#")) or filename.endswith("~")
+            or filename.endswith((".swp", ".swx", ".tmp")))
+
+
+class PollingWatcher(object):
+    """
+    Watches directories by comparing the modification times of their files.
+
+    Parameters
+    ----------
+    directories : list[str]
+        The directories to watch, recursively.
+    interval : Optional[float]
+        The time between checks, in seconds. Default is 0.5.
+    debounce : Optional[float]
+        How long to wait for changes to stop, in seconds, before reporting
+        them. Default is 0.3.
+
+    """
+    def __init__(self, directories, interval=0.5, debounce=0.3):
+        self.directories = directories
+        self.interval = interval
+        self.debounce = debounce
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        """
+        Record the modification time and size of every file.
+
+        Returns
+        -------
+        dict[str, tuple[int, int]]
+            The files with their modification time and size.
+
+        """
+        snapshot = {}
+        for directory in self.directories:
+            for root, dirs, files in os.walk(directory):
+                for filename in files:
+                    path = posixpath.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _poll(self):
+        """
+        Find the files which changed since the last check.
+
+        Returns
+        -------
+        set[str]
+            The files which were added, removed, or modified.
+
+        """
+        snapshot = self._scan()
+        changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                   if snapshot.get(path) != self._snapshot.get(path)}
+        self._snapshot = snapshot
+        return {path for path in changed if not ignored(path)}
+
+    def changes(self):
+        """
+        Wait for changes.
+
+        Yields
+        ------
+        set[str]
+            The files which changed, once changes stop for the debounce time.
+
+        """
+        while True:
+            time.sleep(self.interval)
+            changed = self._poll()
+            if not changed:
+                continue
+            while True:
+                time.sleep(self.debounce)
+                more = self._poll()
+                if not more:
+                    break
+                changed |= more
+            yield changed
+
+    def close(self):
+        """
+        Stop watching.
+
+        """
+
+
+class InotifyWatcher(object):
+    """
+    Watches directories using inotify.
+
+    Parameters
+    ----------
+    directories : list[str]
+        The directories to watch, recursively.
+    debounce : Optional[float]
+        How long to wait for changes to stop, in seconds, before reporting
+        them. Default is 0.3.
+
+    Raises
+    ------
+    OSError
+        If inotify is not available.
+
+    """
+    def __init__(self, directories, debounce=0.3):
+        self.debounce = debounce
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "could not initialize inotify")
+        self._watches = {}
+        for directory in directories:
+            for root, dirs, files in os.walk(directory):
+                self._add_watch(root)
+
+    def _add_watch(self, directory):
+        """
+        Watch a single directory.
+
+        Parameters
+        ----------
+        directory : str
+            The directory to watch.
+
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory),
+                                          IN_EVENTS)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(),
+                          "could not watch {}".format(directory))
+        self._watches[wd] = directory
+
+    def _read(self, timeout):
+        """
+        Read the pending events.
+
+        Parameters
+        ----------
+        timeout : float|None
+            How long to wait for events, in seconds. None waits indefinitely.
+
+        Returns
+        -------
+        set[str]
+            The files which changed.
+
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            buffer = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if wd not in self._watches:
+                continue
+            path = posixpath.join(self._watches[wd], name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(path):
+                    self._add_watch(path)
+            elif not ignored(path):
+                changed.add(path)
+        return changed
+
+    def changes(self):
+        """
+        Wait for changes.
+
+        Yields
+        ------
+        set[str]
+            The files which changed, once changes stop for the debounce time.
+
+        """
+        while True:
+            changed = self._read(None)
+            if not changed:
+                continue
+            while True:
+                more = self._read(self.debounce)
+                if not more:
+                    break
+                changed |= more
+            yield changed
+
+    def close(self):
+        """
+        Stop watching.
+
+        """
+        os.close(self._fd)
+
+
+def watch(directories, interval=0.5, debounce=0.3, polling=False):
+    """
+    Create a watcher for directories.
+
+    Parameters
+    ----------
+    directories : list[str]
+        The directories to watch, recursively.
+    interval : Optional[float]
+        The time between checks when polling, in seconds. Default is 0.5.
+    debounce : Optional[float]
+        How long to wait for changes to stop, in seconds, before reporting
+        them. Default is 0.3.
+    polling : Optional[bool]
+        Whether to poll even if inotify is available. Default is False.
+
+    Returns
+    -------
+    InotifyWatcher|PollingWatcher
+        The watcher.
+
+    """
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories, debounce=debounce)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories, interval=interval, debounce=debounce)